@@ -0,0 +1,49 @@
+import hashlib
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.views.decorators.http import condition
+
+from utils.cache import get_model_versions, get_models_modified
+
+from .models import (
+    Auto,
+    Partner,
+    AutoPartnerConnection
+)
+
+# Tables every Auto and Partner response is built from
+MODELS = (Partner, Auto, AutoPartnerConnection)
+
+
+def response_etag(request, *args, **kwargs):
+    """
+    Hash of the path and the version counters of MODELS: every write
+    changes it, and it costs a cache read instead of a query
+    """
+    if request.method not in ('GET', 'HEAD') or not settings.MODEL_VERSIONS_SHARED:
+        return None
+    return hashlib.md5(
+        repr((request.get_full_path(), get_model_versions(MODELS))).encode()
+    ).hexdigest()
+
+
+def response_last_modified(request, *args, **kwargs):
+    """
+    Time of the latest write of MODELS. Whole seconds: a second write in
+    the same second does not change it, clients should prefer the ETag
+    (If-None-Match wins over If-Modified-Since)
+    """
+    if request.method not in ('GET', 'HEAD') or not settings.MODEL_VERSIONS_SHARED:
+        return None
+    latest = get_models_modified(MODELS)
+    if latest is None:
+        return None
+    return datetime.fromtimestamp(latest, tz=timezone.utc)
+
+
+# Answers If-None-Match / If-Modified-Since with 304 before the view runs
+conditional_response = condition(
+    etag_func=response_etag,
+    last_modified_func=response_last_modified
+)
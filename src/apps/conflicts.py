@@ -0,0 +1,45 @@
+import heapq
+from itertools import groupby
+from operator import itemgetter
+
+
+def iterate_intervals(queryset, chunk_size):
+    """
+    (driver, start, end, auto id) of the autos, sorted by driver and start
+    in the database and read through a cursor, chunk by chunk
+    """
+    return queryset.order_by('driver', 'delegation_starting', 'id').values_list(
+        'driver', 'delegation_starting', 'delegation_ending', 'id'
+    ).iterator(chunk_size=chunk_size)
+
+
+def find_driver_conflicts(driver, intervals):
+    """
+    Overlapping pairs of the (start, end, auto id) intervals of one driver,
+    sorted by start. Sweep line: a heap of the intervals still open at the
+    current start, ordered by their end, so every interval is pushed and
+    popped once and only the real overlaps are compared:
+    O(n log n + conflicts). Intervals are closed on both ends.
+    """
+    open_intervals = []
+    for start, end, auto_id in intervals:
+        while open_intervals and open_intervals[0][0] < start:
+            heapq.heappop(open_intervals)
+        for other_end, other_id in open_intervals:
+            yield {
+                'driver': driver,
+                'auto': other_id,
+                'other_auto': auto_id,
+                'start': start,
+                'end': min(end, other_end),
+            }
+        heapq.heappush(open_intervals, (end, auto_id))
+
+
+def find_conflicts(intervals):
+    """
+    Overlapping delegations of the same driver in (driver, start, end,
+    auto id) rows sorted by driver and start, one driver in memory at a time
+    """
+    for driver, rows in groupby(intervals, key=itemgetter(0)):
+        yield from find_driver_conflicts(driver, (row[1:] for row in rows))
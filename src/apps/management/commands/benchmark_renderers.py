@@ -0,0 +1,104 @@
+import random
+import time
+import timeit
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from apps.models import Partner, Auto, AutoPartnerConnection
+from apps.readers import ValuesListReader
+from apps.serializers import AutoSerializer, PartnerSerializer
+from utils import renderers
+
+
+CITIES = ['Budapest', 'Győr', 'Szeged', 'Pécs', 'Debrecen', 'Székesfehérvár']
+STREETS = ['Fő utca', 'Kossuth Lajos út', 'Petőfi Sándor utca', 'Árpád fejedelem útja']
+DRIVERS = ['Kovács Áron', 'Szabó Éva', 'Tóth Ödön', 'Nagy Zsófia', 'Horváth Ürsula']
+
+
+def seed(rows):
+    """
+    `rows` partners and autos, 5 connections each; returns the first id of
+    the new autos and partners
+    """
+    random.seed(0)
+    now = int(time.time())
+    Partner.objects.bulk_create([
+        Partner(name='Partner %d' % i, city=random.choice(CITIES),
+                address='%s %d.' % (random.choice(STREETS), i % 120),
+                company_name='Partner Kft. %d' % i, created_at=now, modify_at=now)
+        for i in range(rows)
+    ])
+    Auto.objects.bulk_create([
+        Auto(average_fuel=random.randint(40, 120) / 10, delegation_starting=now,
+             delegation_ending=now + 86400, driver=random.choice(DRIVERS), owner=random.choice(DRIVERS),
+             type=random.choice(['Magán', 'Céges']), created_at=now, modify_at=now)
+        for i in range(rows)
+    ])
+    # bulk_create does not set the ids on every backend
+    partner_ids = list(Partner.objects.order_by('-id').values_list('id', flat=True)[:rows])
+    auto_ids = list(Auto.objects.order_by('-id').values_list('id', flat=True)[:rows])
+    AutoPartnerConnection.objects.bulk_create([
+        AutoPartnerConnection(auto_id=auto_id, partner_id=partner_id, created_at=now, modify_at=now)
+        for auto_id in auto_ids
+        for partner_id in random.sample(partner_ids, min(5, rows))
+    ])
+    return min(auto_ids), min(partner_ids)
+
+
+def build_payloads(first_auto_id, first_partner_id):
+    """
+    Flat, nested and paginated bodies built from the seeded rows the same
+    way as the list views build them
+    """
+    flat_context = {'query': 'flat', 'depth': 0}
+    nested_context = {'query': 'nested', 'depth': 1}
+    autok = Auto.alive.filter(id__gte=first_auto_id).order_by('id')
+    partnerek = Partner.alive.filter(id__gte=first_partner_id).order_by('id')
+    auto_reader = ValuesListReader(AutoSerializer, flat_context)
+    partner_reader = ValuesListReader(PartnerSerializer, flat_context)
+
+    flat = auto_reader.to_representation(auto_reader.get_queryset(autok))
+    nested = AutoSerializer(
+        AutoSerializer.setup_queryset(autok, nested_context),
+        many=True,
+        context=nested_context
+    ).data
+    page = {'next': 'http://testserver/partner/?cursor=cD0xMA%3D%3D', 'previous': None,
+            'results': partner_reader.to_representation(partner_reader.get_queryset(partnerek))}
+    return {'flat': flat, 'nested': nested, 'page': page}
+
+
+class Command(BaseCommand):
+    help = 'Compare the JSON renderers on list payloads serialized from seeded rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        call_command('migrate', verbosity=0)
+        # the rows are only needed to build the payloads
+        with transaction.atomic():
+            payloads = build_payloads(*seed(options['rows']))
+            transaction.set_rollback(True)
+
+        candidates = [('JSONRenderer', JSONRenderer())]
+        if renderers.orjson is not None:
+            candidates.append(('FastJSONRenderer', renderers.FastJSONRenderer()))
+        else:
+            self.stdout.write('orjson is not installed, FastJSONRenderer == JSONRenderer')
+
+        for name, payload in payloads.items():
+            baseline = None
+            for renderer_name, renderer in candidates:
+                seconds = min(timeit.repeat(
+                    lambda: renderer.render(payload), number=1, repeat=options['repeat']
+                ))
+                baseline = baseline or seconds
+                self.stdout.write('%-8s %-20s %8.2f ms  %5.1fx  %d bytes' % (
+                    name, renderer_name, seconds * 1000, baseline / seconds,
+                    len(renderer.render(payload))
+                ))
@@ -0,0 +1,174 @@
+import http.client
+import itertools
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.authtoken.models import Token
+
+from apps.models import Partner, Auto, AutoPartnerConnection
+
+
+def parse_ints(value):
+    return [int(item) for item in value.split(',')]
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+class Command(BaseCommand):
+    help = """
+    Throughput and latency of /auto/ and /partner/ under gunicorn for every
+    --workers x --threads combination, with the response cache off (the
+    views themselves) and on (cache hits after the first request). The
+    command and the server use the throwaway database named by --database
+    (migrated and seeded, never cleaned up) with the other DB_* settings of
+    the environment, e.g. an SQLite stand-in:
+
+        DB_ENGINE=django.db.backends.sqlite3 python manage.py benchmark_server \\
+            --database /tmp/bench.sqlite3 --workers 1,2,4 --threads 1,4
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', required=True, help='name of a throwaway database')
+        parser.add_argument('--workers', type=parse_ints, default=[1, 2, 4])
+        parser.add_argument('--threads', type=parse_ints, default=[1, 4])
+        parser.add_argument('--response-cache', default='off,on', help='runs with the response cache off and/or on')
+        parser.add_argument('--paths', default='/auto/,/partner/')
+        parser.add_argument('--requests', type=int, default=2000, help='requests per path and run')
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--rows', type=int, default=1000, help='autos and partners seeded')
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        if options['database'] == settings.DATABASES['default']['NAME']:
+            raise CommandError('%s is the database of the application, give a throwaway one' % options['database'])
+        connection.close()
+        connection.settings_dict['NAME'] = options['database']
+        call_command('migrate', verbosity=0)
+        token = self.seed(options['rows'])
+        self.stdout.write('database: %s %s' % (connection.settings_dict['ENGINE'], options['database']))
+        self.stdout.write('%-8s %-8s %-6s %-12s %10s %9s %9s' % (
+            'workers', 'threads', 'cache', 'path', 'req/s', 'p50 ms', 'p99 ms'
+        ))
+
+        for workers, threads, cache in itertools.product(
+                options['workers'], options['threads'], options['response_cache'].split(',')):
+            if cache == 'on' and workers > 1 and settings.CACHES['versions']['BACKEND'].endswith('LocMemCache'):
+                # the server turns the cache off, see MODEL_VERSIONS_SHARED
+                self.stdout.write('%-8d %-8d %-6s needs a shared VERSION_CACHE_BACKEND, skipped' % (
+                    workers, threads, cache
+                ))
+                continue
+            server = self.start_server(workers, threads, cache == 'on', options['database'], options['port'])
+            try:
+                for path in options['paths'].split(','):
+                    # warm every worker up before measuring
+                    self.load(path, token, options['port'], workers * threads * 4, options['concurrency'])
+                    seconds, latencies = self.load(
+                        path, token, options['port'], options['requests'], options['concurrency']
+                    )
+                    self.stdout.write('%-8d %-8d %-6s %-12s %10.1f %9.1f %9.1f' % (
+                        workers, threads, cache, path, len(latencies) / seconds,
+                        percentile(latencies, 0.5) * 1000, percentile(latencies, 0.99) * 1000
+                    ))
+            finally:
+                server.terminate()
+                server.wait()
+
+    def seed(self, rows):
+        """
+        Idempotent test data: `rows` partners and autos, 3 connections each
+        """
+        random.seed(0)
+        now = int(time.time())
+        missing = rows - Partner.alive.count()
+        Partner.objects.bulk_create([
+            Partner(name='Partner %d' % i, city='Győr', address='Fő utca %d.' % i,
+                    company_name='Partner Kft. %d' % i, created_at=now, modify_at=now)
+            for i in range(max(missing, 0))
+        ])
+        missing = rows - Auto.alive.count()
+        Auto.objects.bulk_create([
+            Auto(average_fuel=random.randint(400, 1200) / 100, delegation_starting=now,
+                 delegation_ending=now + 86400, driver='Kovács Áron', owner='Szabó Éva',
+                 type=random.choice(['Magán', 'Céges']), created_at=now, modify_at=now)
+            for i in range(max(missing, 0))
+        ])
+        partner_ids = list(Partner.alive.values_list('id', flat=True))
+        AutoPartnerConnection.objects.bulk_create([
+            AutoPartnerConnection(auto_id=auto_id, partner_id=partner_id, created_at=now, modify_at=now)
+            for auto_id in Auto.alive.values_list('id', flat=True)
+            for partner_id in random.sample(partner_ids, min(3, len(partner_ids)))
+        ], ignore_conflicts=True)
+
+        user, _ = get_user_model().objects.get_or_create(username='benchmark')
+        return Token.objects.get_or_create(user=user)[0].key
+
+    def start_server(self, workers, threads, response_cache, database, port):
+        env = dict(
+            os.environ,
+            DB_NAME=database,
+            GUNICORN_BIND='127.0.0.1:%d' % port,
+            GUNICORN_WORKERS=str(workers),
+            GUNICORN_THREADS=str(threads),
+            # every client requests the same urls, with the cache on only
+            # the first request of each reaches the view
+            RESPONSE_CACHE='1' if response_cache else '0',
+            # request logging would measure stdout, not the application
+            LOG_SAMPLE_RATE_AUTO='0',
+            LOG_SAMPLE_RATE_PARTNER='0',
+        )
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', os.path.join(settings.BASE_DIR, 'gunicorn.conf.py'),
+             'roadrecord.wsgi'],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError('gunicorn exited with %d' % server.returncode)
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return server
+            except OSError:
+                time.sleep(0.1)
+        server.terminate()
+        raise CommandError('gunicorn did not start listening on %d' % port)
+
+    def load(self, path, token, port, requests, concurrency):
+        """
+        `requests` GETs of `path` from `concurrency` keep-alive clients
+        """
+        headers = {'Authorization': 'Token ' + token}
+
+        def client(count):
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            latencies = []
+            for _ in range(count):
+                start = time.perf_counter()
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    raise CommandError('%s answered %d' % (path, response.status))
+                latencies.append(time.perf_counter() - start)
+            connection.close()
+            return latencies
+
+        counts = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            latencies = [latency for result in executor.map(client, counts) for latency in result]
+        return time.perf_counter() - start, latencies
@@ -0,0 +1,77 @@
+import json
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.conflicts import find_conflicts, iterate_intervals
+from apps.models import Auto
+
+
+def generate_intervals(count, drivers):
+    """
+    `count` random delegations of `drivers` drivers over a year, a few
+    hours to a few days long
+    """
+    random.seed(0)
+    for auto_id in range(count):
+        start = random.randrange(365 * 86400)
+        yield ('driver%d' % random.randrange(drivers), start, start + random.randrange(3600, 5 * 86400), auto_id)
+
+
+def find_conflicts_pairwise(intervals):
+    """
+    Reference O(n^2) comparison of every pair of the same driver
+    """
+    conflicts = 0
+    for i, (driver, start, end, _) in enumerate(intervals):
+        for other_driver, other_start, other_end, _ in intervals[i + 1:]:
+            if driver == other_driver and start <= other_end and other_start <= end:
+                conflicts += 1
+    return conflicts
+
+
+class Command(BaseCommand):
+    help = """
+    Print the overlapping delegations of the same driver as JSON lines, or
+    with --benchmark N time the sweep line on N generated intervals
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--driver')
+        parser.add_argument('--benchmark', type=int, metavar='N')
+        parser.add_argument('--drivers', type=int, default=10000, help='drivers of the generated intervals')
+        parser.add_argument('--pairwise', type=int, default=5000,
+                            help='generated intervals compared pairwise for reference')
+
+    def handle(self, *args, **options):
+        if options['benchmark']:
+            return self.benchmark(options['benchmark'], options['drivers'], options['pairwise'])
+
+        autok = Auto.alive.all()
+        if options['driver']:
+            autok = autok.filter(driver=options['driver'])
+        for conflict in find_conflicts(iterate_intervals(autok, settings.STREAM_CHUNK_SIZE)):
+            self.stdout.write(json.dumps(conflict, ensure_ascii=False))
+
+    def benchmark(self, count, drivers, pairwise):
+        intervals = list(generate_intervals(count, drivers))
+
+        start = time.perf_counter()
+        intervals.sort()
+        sorted_at = time.perf_counter()
+        conflicts = sum(1 for _ in find_conflicts(intervals))
+        end = time.perf_counter()
+        self.stdout.write('sweep line: %d intervals, %d conflicts, sort %.2f s + sweep %.2f s = %.2f s' % (
+            count, conflicts, sorted_at - start, end - sorted_at, end - start
+        ))
+
+        sample = intervals[:pairwise]
+        start = time.perf_counter()
+        expected = find_conflicts_pairwise(sample)
+        seconds = time.perf_counter() - start
+        found = sum(1 for _ in find_conflicts(sample))
+        self.stdout.write('pairwise: %d intervals, %d conflicts (sweep line: %d), %.2f s, O(n^2) at %d: ~%.0f s' % (
+            len(sample), expected, found, seconds, count, seconds * (count / max(len(sample), 1)) ** 2
+        ))
@@ -0,0 +1,59 @@
+# Generated by Django 2.2.13 on 2026-10-17 07:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0005_auto_20201008_0932'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auto',
+            name='created_at',
+            field=models.IntegerField(default=1792221617, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='auto',
+            name='modify_at',
+            field=models.IntegerField(default=1792221617),
+        ),
+        migrations.AlterField(
+            model_name='autopartnerconnection',
+            name='created_at',
+            field=models.IntegerField(default=1792221617, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='autopartnerconnection',
+            name='modify_at',
+            field=models.IntegerField(default=1792221617),
+        ),
+        migrations.AlterField(
+            model_name='partner',
+            name='created_at',
+            field=models.IntegerField(default=1792221617, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='partner',
+            name='modify_at',
+            field=models.IntegerField(default=1792221617),
+        ),
+        migrations.AddIndex(
+            model_name='auto',
+            index=models.Index(condition=models.Q(deleted_at=None), fields=['id'], name='auto_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='autopartnerconnection',
+            index=models.Index(condition=models.Q(deleted_at=None), fields=['auto', 'partner'], name='autopartner_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='autopartnerconnection',
+            index=models.Index(condition=models.Q(deleted_at=None), fields=['partner', 'auto'], name='partnerauto_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='partner',
+            index=models.Index(condition=models.Q(deleted_at=None), fields=['id'], name='partner_alive_idx'),
+        ),
+    ]
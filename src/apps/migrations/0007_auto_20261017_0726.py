@@ -0,0 +1,55 @@
+# Generated by Django 2.2.13 on 2026-10-17 07:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0006_auto_20261017_0720'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auto',
+            name='created_at',
+            field=models.IntegerField(default=1792221982, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='auto',
+            name='modify_at',
+            field=models.IntegerField(default=1792221982),
+        ),
+        migrations.AlterField(
+            model_name='autopartnerconnection',
+            name='created_at',
+            field=models.IntegerField(default=1792221982, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='autopartnerconnection',
+            name='modify_at',
+            field=models.IntegerField(default=1792221982),
+        ),
+        migrations.AlterField(
+            model_name='partner',
+            name='created_at',
+            field=models.IntegerField(default=1792221982, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='partner',
+            name='modify_at',
+            field=models.IntegerField(default=1792221982),
+        ),
+        migrations.AddIndex(
+            model_name='auto',
+            index=models.Index(fields=['modify_at'], name='auto_modify_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='autopartnerconnection',
+            index=models.Index(fields=['modify_at'], name='autopartner_modify_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='partner',
+            index=models.Index(fields=['modify_at'], name='partner_modify_at_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 2.2.13 on 2026-10-17 08:05
+
+from django.db import migrations, models
+
+
+def create_delegation_range_index(apps, schema_editor):
+    # GiST range index of AutoQuerySet.overlapping, postgres only
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "CREATE INDEX auto_delegation_range_idx ON apps_auto USING gist "
+        "(int8range(delegation_starting, delegation_ending, '[]')) "
+        "WHERE deleted_at IS NULL"
+    )
+
+
+def drop_delegation_range_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS auto_delegation_range_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0007_auto_20261017_0726'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auto',
+            name='created_at',
+            field=models.IntegerField(default=1792224342, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='auto',
+            name='modify_at',
+            field=models.IntegerField(default=1792224342),
+        ),
+        migrations.AlterField(
+            model_name='autopartnerconnection',
+            name='created_at',
+            field=models.IntegerField(default=1792224342, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='autopartnerconnection',
+            name='modify_at',
+            field=models.IntegerField(default=1792224342),
+        ),
+        migrations.AlterField(
+            model_name='partner',
+            name='created_at',
+            field=models.IntegerField(default=1792224342, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='partner',
+            name='modify_at',
+            field=models.IntegerField(default=1792224342),
+        ),
+        migrations.RunPython(create_delegation_range_index, drop_delegation_range_index),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.13 on 2026-10-17 08:44
+
+import time
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def tombstone_orphan_connections(apps, schema_editor):
+    # rows soft deleted before the cascade kept their live connections;
+    # they get the deleted_at of the deleted end, so restoring it brings
+    # them back, and a fresh modify_at for the /changes/ clients
+    AutoPartnerConnection = apps.get_model('apps', 'AutoPartnerConnection')
+    now = int(time.time())
+    for name in ('auto', 'partner'):
+        model = apps.get_model('apps', name)
+        AutoPartnerConnection.objects.filter(**{
+            'deleted_at': None,
+            name + '__deleted_at__isnull': False,
+        }).update(
+            deleted_at=Subquery(model.objects.filter(pk=OuterRef(name + '_id')).values('deleted_at')),
+            modify_at=now
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apps', '0008_auto_20261017_0805'),
+    ]
+
+    operations = [
+        migrations.RunPython(tombstone_orphan_connections, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import connections, models
+from django.db.models import Func, Q, Value
 
-from utils.mixins import TimeStampMixin
+from utils.mixins import AliveManager, SoftDeleteQuerySet, TimeStampMixin
 
 
 AUTO_HASZNALATI_TIPUS = (
@@ -44,10 +45,54 @@ class Partner(TimeStampMixin):
         through="AutoPartnerConnection"
     )
 
+    soft_delete_cascade = ('autopartnerconnection',)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['id'],
+                name='partner_alive_idx',
+                condition=Q(deleted_at=None)
+            ),
+            models.Index(
+                fields=['modify_at'],
+                name='partner_modify_at_idx'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
 
+class AutoQuerySet(SoftDeleteQuerySet):
+    """
+    Delegation window queries, closed intervals on both ends
+    """
+
+    def overlapping(self, start, end):
+        """
+        Autos delegated at any moment of [start, end]
+        """
+        if connections[self.db].vendor == 'postgresql':
+            from django.contrib.postgres.fields import BigIntegerRangeField
+            from psycopg2.extras import NumericRange
+
+            # && of the ranges, answered by the auto_delegation_range_idx
+            # GiST index of migration 0008 (same expression)
+            return self.annotate(delegation_range=Func(
+                'delegation_starting', 'delegation_ending', Value('[]'),
+                function='int8range',
+                output_field=BigIntegerRangeField()
+            )).filter(delegation_range__overlap=NumericRange(start, end, '[]'))
+        return self.filter(delegation_starting__lte=end, delegation_ending__gte=start)
+
+    def active_at(self, moment):
+        """
+        Autos delegated at `moment`
+        """
+        return self.overlapping(moment, moment)
+
+
 class Auto(TimeStampMixin):
     """
     - id [number]
@@ -93,6 +138,24 @@ class Auto(TimeStampMixin):
         through="AutoPartnerConnection"
     )
 
+    objects = AutoQuerySet.as_manager()
+    alive = AliveManager.from_queryset(AutoQuerySet)()
+
+    soft_delete_cascade = ('autopartnerconnection',)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['id'],
+                name='auto_alive_idx',
+                condition=Q(deleted_at=None)
+            ),
+            models.Index(
+                fields=['modify_at'],
+                name='auto_modify_at_idx'
+            ),
+        ]
+
     def __str__(self):
         return f'{self.driver} - {self.type}'
 
@@ -109,3 +172,19 @@ class AutoPartnerConnection(TimeStampMixin):
 
     class Meta:
         unique_together = ('auto', 'partner',)
+        indexes = [
+            models.Index(
+                fields=['auto', 'partner'],
+                name='autopartner_alive_idx',
+                condition=Q(deleted_at=None)
+            ),
+            models.Index(
+                fields=['partner', 'auto'],
+                name='partnerauto_alive_idx',
+                condition=Q(deleted_at=None)
+            ),
+            models.Index(
+                fields=['modify_at'],
+                name='autopartner_modify_at_idx'
+            ),
+        ]
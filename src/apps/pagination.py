@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the primary key:
+     - the cursor is opaque (base64 encoded position)
+     - every page is a `WHERE id > position ORDER BY id LIMIT n` query,
+       so deep pages cost the same as the first one
+     - page size is configurable with ?page_size=
+    """
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
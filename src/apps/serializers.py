@@ -1,5 +1,8 @@
+import time
 
+from django.db import connections, transaction
 from django.db.models import Prefetch, Q
+from django.utils.functional import cached_property
 from django.utils.translation import ugettext_lazy as _
 from rest_framework import serializers
 
@@ -8,7 +11,18 @@ from .models import (
     Partner,
     AutoPartnerConnection
 )
-from utils.mixins import NestedOrFlatSerializerMixin
+from utils.mixins import NestedOrFlatSerializerMixin, SparseFieldsSerializerMixin
+
+
+def get_depth(context):
+    """
+    Expansion depth of the relationship fields, 1 for the legacy
+    ?query=nested when no explicit depth was given
+    """
+    depth = context.get("depth", None)
+    if depth is None:
+        return 1 if context.get("query", None) == 'nested' else 0
+    return depth
 
 
 class AutoPartnerConnectionSerializer(serializers.ModelSerializer):
@@ -23,10 +37,244 @@ class AutoPartnerConnectionSerializer(serializers.ModelSerializer):
                   ]
 
 
-class AutoSerializer(serializers.ModelSerializer):
+class PartnerAssignmentSerializer(serializers.Serializer):
+    """
+    List of partner ids to connect to an auto
+    """
+    partner = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False
+    )
+
+
+class BulkSoftDeleteSerializer(serializers.Serializer):
+    """
+    Rows of a bulk soft delete or restore:
+     - ids [array]
+     - filter [object] exact match on the fields in context['filter_fields']
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False
+    )
+    filter = serializers.DictField(
+        child=serializers.CharField(),
+        required=False
+    )
+
+    def validate_filter(self, value):
+        unknown = set(value) - set(self.context.get('filter_fields', ()))
+        if unknown:
+            raise serializers.ValidationError(
+                _('Unknown filter fields: %s') % ', '.join(sorted(unknown))
+            )
+        return value
+
+    def validate(self, attrs):
+        if not attrs.get('ids') and not attrs.get('filter'):
+            raise serializers.ValidationError(
+                _('Either ids or filter is required.')
+            )
+        return attrs
+
+    def filter_queryset(self, queryset):
+        if self.validated_data.get('ids'):
+            queryset = queryset.filter(pk__in=self.validated_data['ids'])
+        if self.validated_data.get('filter'):
+            queryset = queryset.filter(**self.validated_data['filter'])
+        return queryset
+
+
+class BulkCreateListSerializer(serializers.ListSerializer):
+    """
+    Creates the validated items with batched INSERTs in one transaction,
+    the returned instances keep the order of the input
+    """
+
+    batch_size = 500
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        now = int(time.time())
+        instances = [
+            model(created_at=now, modify_at=now, **attrs)
+            for attrs in validated_data
+        ]
+        with transaction.atomic():
+            features = connections[model.objects.db].features
+            if features.can_return_ids_from_bulk_insert:
+                return model.objects.bulk_create(
+                    instances,
+                    batch_size=self.batch_size
+                )
+            # the backend cannot report the new ids of a bulk INSERT
+            for instance in instances:
+                instance.save()
+        return instances
+
+
+class ExpandableRelationSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
+    """
+    Serializer for a model with one Auto<->Partner relationship field.
+
+    The relationship is rendered as a list of ids or, while the depth in
+    the context is positive, as nested objects of the related serializer.
+    It is read through the live AutoPartnerConnection rows only (soft
+    delete tombstones the connections of both ends). Every level of the
+    graph is loaded with one query by `setup_eager_loading`, and objects
+    already on the current path are kept as ids so the expansion never
+    recurses back into a parent. ?fields= / ?exclude= apply to the top
+    level objects only.
+    """
+
+    relation_field = None
+    # AutoPartnerConnection foreign key of the related object
+    connection_field = None
+
+    @classmethod
+    def related_serializer_class(cls):
+        raise NotImplementedError
+
+    @classmethod
+    def live_connections(cls):
+        return AutoPartnerConnection.alive.select_related(
+            cls.connection_field
+        ).order_by(cls.connection_field + '_id')
+
+    @classmethod
+    def live_prefetch(cls, depth, lookup_prefix=''):
+        """
+        Prefetch of the live connections with their related objects,
+        `depth` more levels deep
+        """
+        queryset = cls.live_connections()
+        if depth > 0:
+            queryset = queryset.prefetch_related(
+                cls.related_serializer_class().live_prefetch(
+                    depth - 1,
+                    cls.connection_field + '__'
+                )
+            )
+        return Prefetch(
+            lookup_prefix + 'autopartnerconnection_set',
+            queryset=queryset,
+            to_attr='live_connections'
+        )
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, depth=0):
+        """
+        Load the relationship of the queryset for `depth` nested levels,
+        one query per level
+        """
+        return queryset.prefetch_related(cls.live_prefetch(depth))
+
+    @classmethod
+    def setup_queryset(cls, queryset, context):
+        """
+        Select only the columns of the requested fields and load the
+        relationship only when it is rendered
+        """
+        field_names = cls.select_field_names(cls.Meta.fields, context)
+        queryset = queryset.only(*[
+            name for name in field_names if name != cls.relation_field
+        ])
+        if cls.relation_field in field_names:
+            queryset = cls.setup_eager_loading(queryset, get_depth(context))
+        return queryset
+
+    def get_related_instances(self, instance):
+        connections = getattr(instance, 'live_connections', None)
+        if connections is None:
+            connections = self.live_connections().filter(**{
+                self.Meta.model._meta.model_name: instance
+            })
+        return [
+            getattr(connection, self.connection_field)
+            for connection in connections
+        ]
+
+    def get_nested_serializer(self, serializer_class, depth, sparse=False):
+        """
+        One nested serializer per class and depth for the whole response,
+        the sparse fieldset is kept only when `sparse` is set
+        """
+        nested_serializers = self.context.setdefault('nested_serializers', {})
+        # shared by reference with every nested serializer
+        self.context.setdefault('identity_map', {})
+        self.context.setdefault('path', set())
+        key = (serializer_class, depth, sparse)
+        if key not in nested_serializers:
+            context = dict(self.context)
+            context['depth'] = depth
+            if not sparse:
+                context.pop('fields', None)
+                context.pop('exclude', None)
+            nested_serializers[key] = serializer_class(context=context)
+        return nested_serializers[key]
+
+    @cached_property
+    def field_names(self):
+        return tuple(self.fields)
+
+    def to_representation(self, instance):
+        """
+        Every object is serialized once per response: the flat
+        representation is kept in an identity map keyed by model and pk,
+        and only the relationship is expanded again at positive depth
+        because it depends on the path.
+        """
+        identity_map = self.context.setdefault('identity_map', {})
+        depth = get_depth(self.context)
+        if depth <= 0:
+            flat = self
+        else:
+            # only the top level context keeps ?fields= / ?exclude=
+            sparse = 'fields' in self.context or 'exclude' in self.context
+            flat = self.get_nested_serializer(type(self), 0, sparse=sparse)
+        key = (self.Meta.model, instance.pk, flat.field_names)
+        if key not in identity_map:
+            identity_map[key] = super(
+                ExpandableRelationSerializer, flat
+            ).to_representation(instance)
+        if depth <= 0 or self.relation_field not in self.field_names:
+            return identity_map[key]
+
+        representation = identity_map[key].copy()
+        representation[self.relation_field] = self.expand_relation(instance)
+        return representation
+
+    def expand_relation(self, instance):
+        instances = self.get_related_instances(instance)
+        depth = get_depth(self.context)
+        if depth <= 0:
+            return [obj.id for obj in instances]
+
+        nested = self.get_nested_serializer(
+            self.related_serializer_class(),
+            depth - 1
+        )
+        path = self.context['path']
+        related_model = nested.Meta.model
+        key = (self.Meta.model, instance.pk)
+        path.add(key)
+        try:
+            return [
+                obj.id if (related_model, obj.pk) in path
+                else nested.to_representation(obj)
+                for obj in instances
+            ]
+        finally:
+            path.discard(key)
+
+
+class AutoSerializer(ExpandableRelationSerializer):
 
     hozzarendelt_partnerek = serializers.SerializerMethodField()
 
+    relation_field = 'hozzarendelt_partnerek'
+    connection_field = 'partner'
+
     class Meta:
         model = Auto
         fields = ['id',
@@ -41,19 +289,30 @@ class AutoSerializer(serializers.ModelSerializer):
                   'modify_at',
                   'deleted_at'
                   ]
+        list_serializer_class = BulkCreateListSerializer
+
+    def validate(self, attrs):
+        if attrs['delegation_starting'] > attrs['delegation_ending']:
+            raise serializers.ValidationError({
+                'delegation_ending': [_('The delegation must not end before it starts.')]
+            })
+        return attrs
+
+    @classmethod
+    def related_serializer_class(cls):
+        return PartnerSerializer
 
     def get_hozzarendelt_partnerek(self, instance):
-        instances = instance.hozzarendelt_partnerek.filter(deleted_at=None)
-        if self.context.get("query", None) == 'nested':
-            return PartnerSerializer(instances, many=True).data
-        else:
-            return [obj.id for obj in instances.all()]
+        return self.expand_relation(instance)
 
 
-class PartnerSerializer(serializers.ModelSerializer):
+class PartnerSerializer(ExpandableRelationSerializer):
 
     hozzarendelt_autok = serializers.SerializerMethodField()
 
+    relation_field = 'hozzarendelt_autok'
+    connection_field = 'auto'
+
     class Meta:
         model = Partner
         fields = ['id',
@@ -66,10 +325,11 @@ class PartnerSerializer(serializers.ModelSerializer):
                   'modify_at',
                   'deleted_at'
                   ]
+        list_serializer_class = BulkCreateListSerializer
+
+    @classmethod
+    def related_serializer_class(cls):
+        return AutoSerializer
 
     def get_hozzarendelt_autok(self, instance):
-        instances = instance.hozzarendelt_autok.filter(deleted_at=None)
-        if self.context.get("query", None) == 'nested':
-            return AutoSerializer(instances, many=True).data
-        else:
-            return [obj.id for obj in instances.all()]
+        return self.expand_relation(instance)
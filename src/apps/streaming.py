@@ -0,0 +1,71 @@
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from rest_framework.settings import api_settings
+
+
+def iterate_in_chunks(queryset, chunk_size):
+    """
+    Walk the queryset in primary key order, one keyset query per chunk.
+
+    `QuerySet.iterator()` would drop `prefetch_related`, chunking on the
+    primary key keeps the relationship batched and only `chunk_size` rows
+    in memory at a time.
+    """
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        chunk = queryset
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1].pk
+
+
+def stream_json_list(queryset, serializer_class, context, chunk_size):
+    """
+    Yield the serialized queryset as one JSON array, chunk by chunk
+    """
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    separator = b''
+    yield b'['
+    for chunk in iterate_in_chunks(queryset, chunk_size):
+        # fresh context, the identity map must not outlive the chunk
+        serializer = serializer_class(chunk, many=True, context=dict(context))
+        # strip the brackets of the rendered chunk
+        yield separator + renderer.render(serializer.data)[1:-1]
+        separator = b','
+    yield b']'
+
+
+def streaming_list_response(queryset, serializer_class, context, chunk_size):
+    return StreamingHttpResponse(
+        stream_json_list(queryset, serializer_class, context, chunk_size),
+        content_type='application/json'
+    )
+
+
+def stream_json_rows(rows, chunk_size):
+    """
+    Yield the rows (plain JSON values) as one JSON array, chunk by chunk
+    """
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    separator = b''
+    yield b'['
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        yield separator + renderer.render(chunk)[1:-1]
+        separator = b','
+    yield b']'
+
+
+def streaming_rows_response(rows, chunk_size):
+    return StreamingHttpResponse(
+        stream_json_rows(iter(rows), chunk_size),
+        content_type='application/json'
+    )
@@ -1,11 +1,41 @@
+import io
+import json
 import logging
-
+import os
+import queue
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from importlib import import_module
+from unittest import mock
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core.management import call_command
 from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.db.utils import OperationalError
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.translation import ugettext_lazy
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import Serializer
 from rest_framework.test import APIClient, APITestCase
 
+from roadrecord import log, metrics, middleware, warmup
+from utils import renderers
+from utils.authentication import CachedTokenAuthentication, TokenCache, token_cache
+from utils.postgresql import base as pool_backend
+from utils.cache import get_response_cache, get_version_cache, model_version_key
+
 from .models import Partner, Auto, AutoPartnerConnection
+from .conflicts import find_conflicts
+from .management.commands.delegation_conflicts import find_conflicts_pairwise, generate_intervals
+from .readers import ValuesListReader, _converters
 from .serializers import (
     PartnerSerializer,
     AutoSerializer
@@ -183,7 +213,7 @@ class PartnerGetAllTest(APITestCase):
 
         partnerek = Partner.objects.all()
         serializer = PartnerSerializer(partnerek, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_get_all_partners_nested(self):
@@ -196,7 +226,7 @@ class PartnerGetAllTest(APITestCase):
 
         partnerek = Partner.objects.all()
         serializer = PartnerSerializer(partnerek, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_get_all_partners_flat(self):
@@ -209,7 +239,7 @@ class PartnerGetAllTest(APITestCase):
 
         partnerek = Partner.objects.all()
         serializer = PartnerSerializer(partnerek, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
 
@@ -328,7 +358,7 @@ class PartnerDeleteTest(APITestCase):
         response = self.client.get(reverse('partner-list'))
         partnerek = Partner.objects.filter(deleted_at=None)
         serializer = PartnerSerializer(partnerek, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
         self.assertEqual(Partner.objects.count(), 2)
 
     def test_partner_delete_no_auth(self):
@@ -410,6 +440,25 @@ class AutoCreateTest(APITestCase):
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_create_auto_delegation_ending_before_starting(self):
+        """
+        Ensure we cannot create an auto delegated backwards in time.
+        """
+        url = reverse('auto-list')
+        data = {
+            "average_fuel": "12.3",
+            "delegation_starting": "123",
+            "delegation_ending": "0",
+            "driver": "Bela",
+            "owner": "Bela",
+            "type": "Magán"
+        }
+        self.client.force_authenticate(self.user)
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('delegation_ending', response.data)
+        self.assertEqual(Auto.objects.count(), 0)
+
     def test_create_auto_require_delegation_starting(self):
         """
         Ensure we cannot create an invalid auto object.
@@ -545,7 +594,7 @@ class AutoGetAllTest(APITestCase):
 
         autok = Auto.objects.all()
         serializer = AutoSerializer(autok, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_get_all_autos_nested(self):
@@ -558,7 +607,7 @@ class AutoGetAllTest(APITestCase):
 
         autok = Auto.objects.all()
         serializer = AutoSerializer(autok, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_get_all_autos_flat(self):
@@ -571,7 +620,7 @@ class AutoGetAllTest(APITestCase):
 
         autok = Auto.objects.all()
         serializer = AutoSerializer(autok, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
 
@@ -718,7 +767,7 @@ class AutoDeleteTest(APITestCase):
         response = self.client.get(reverse('auto-list'))
         autok = Auto.objects.filter(deleted_at=None)
         serializer = AutoSerializer(autok, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
         self.assertEqual(Auto.objects.count(), 2)
 
     def test_auto_delete_no_auth(self):
@@ -738,6 +787,209 @@ class AutoDeleteTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
+class BulkSoftDeleteTest(APITestCase):
+    """
+    Test module for the set based bulk soft delete and restore
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="user1", email="user1@test.com", password="password1")
+        self.client = APIClient()
+
+        self.autok = [
+            Auto.objects.create(
+                average_fuel=12.3,
+                delegation_starting=0,
+                delegation_ending=123,
+                driver='Bela%d' % (i % 2),
+                owner='Bela',
+                type='Magán'
+            )
+            for i in range(4)
+        ]
+
+    def test_bulk_delete_ids(self):
+        self.client.force_authenticate(self.user)
+        # one UPDATE for the connections, one for the autos and the savepoints
+        with self.assertNumQueries(4):
+            response = self.client.post(
+                reverse('auto-bulk-delete'),
+                {'ids': [self.autok[0].id, self.autok[1].id]},
+                format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'count': 2})
+        self.assertEqual(
+            list(Auto.alive.values_list('id', flat=True)),
+            [self.autok[2].id, self.autok[3].id]
+        )
+
+    def test_bulk_delete_filter_and_restore(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            reverse('auto-bulk-delete'),
+            {'filter': {'driver': 'Bela0'}},
+            format='json'
+        )
+        self.assertEqual(response.data, {'count': 2})
+        self.assertEqual(Auto.alive.count(), 2)
+
+        response = self.client.post(
+            reverse('auto-bulk-restore'),
+            {'ids': [auto.id for auto in self.autok]},
+            format='json'
+        )
+        self.assertEqual(response.data, {'count': 2})
+        self.assertEqual(Auto.alive.count(), 4)
+
+    def test_bulk_restore_partner(self):
+        partner = Partner.objects.create(
+            name='Bolt1', city='LA', address='4035 Cím utca 8', company_name='Bolt1')
+        self.client.force_authenticate(self.user)
+        self.client.delete(reverse('partner-detail', kwargs={'pk': partner.id}))
+        response = self.client.post(
+            reverse('partner-bulk-restore'),
+            {'filter': {'city': 'LA'}},
+            format='json'
+        )
+        self.assertEqual(response.data, {'count': 1})
+        self.assertIsNone(Partner.objects.get(id=partner.id).deleted_at)
+
+    def test_bulk_delete_invalid(self):
+        self.client.force_authenticate(self.user)
+        for data in [{}, {'ids': []}, {'filter': {'deleted_at': '1'}}]:
+            response = self.client.post(
+                reverse('auto-bulk-delete'),
+                data,
+                format='json'
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Auto.alive.count(), 4)
+
+    def test_bulk_delete_no_auth(self):
+        response = self.client.post(
+            reverse('auto-bulk-delete'),
+            {'ids': [self.autok[0].id]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class CascadingSoftDeleteTest(APITestCase):
+    """
+    Test module for soft deleting the connections together with autos and partners
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="user1", email="user1@test.com", password="password1")
+        self.client = APIClient()
+
+        self.auto = Auto.objects.create(
+            average_fuel=12.3,
+            delegation_starting=0,
+            delegation_ending=123,
+            driver='Bela',
+            owner='Bela2',
+            type='Magán'
+        )
+        self.partner = Partner.objects.create(
+            name='Bolt1', city='LA', address='4035 Cím utca 8', company_name='Bolt1')
+        self.partner2 = Partner.objects.create(
+            name='Bolt2', city='LA', address='4035 Cím utca 8', company_name='Bolt1')
+        AutoPartnerConnection.objects.create(auto=self.auto, partner=self.partner)
+        AutoPartnerConnection.objects.create(auto=self.auto, partner=self.partner2)
+
+    def test_migration_tombstones_connections_of_deleted_rows(self):
+        # deleted before the cascade existed, the connection is still live
+        Partner.objects.filter(id=self.partner.id).update(deleted_at=5)
+        migration = import_module('apps.migrations.0009_auto_20261017_0844')
+        migration.tombstone_orphan_connections(django_apps, None)
+
+        connection = AutoPartnerConnection.objects.get(partner=self.partner)
+        self.assertEqual(connection.deleted_at, 5)
+        self.assertGreater(connection.modify_at, 5)
+        self.assertIsNone(AutoPartnerConnection.objects.get(partner=self.partner2).deleted_at)
+
+        Partner.objects.filter(id=self.partner.id).restore()
+        self.assertIsNone(AutoPartnerConnection.objects.get(partner=self.partner).deleted_at)
+
+    def test_delete_partner_tombstones_connections(self):
+        self.client.force_authenticate(self.user)
+        self.client.delete(reverse('partner-detail', kwargs={'pk': self.partner.id}))
+
+        connection = AutoPartnerConnection.objects.get(partner=self.partner)
+        self.assertEqual(
+            connection.deleted_at,
+            Partner.objects.get(id=self.partner.id).deleted_at
+        )
+        self.assertEqual(AutoPartnerConnection.alive.count(), 1)
+
+        response = self.client.get(
+            reverse('auto-detail', kwargs={'pk': self.auto.id})
+        )
+        self.assertEqual(
+            response.data['hozzarendelt_partnerek'],
+            [self.partner2.id]
+        )
+
+    def test_bulk_delete_autos_tombstones_connections(self):
+        self.client.force_authenticate(self.user)
+        self.client.post(
+            reverse('auto-bulk-delete'),
+            {'ids': [self.auto.id]},
+            format='json'
+        )
+        self.assertEqual(AutoPartnerConnection.alive.count(), 0)
+
+        response = self.client.get(
+            reverse('partner-detail', kwargs={'pk': self.partner.id})
+        )
+        self.assertEqual(response.data['hozzarendelt_autok'], [])
+
+    def test_restore_partner_restores_connections(self):
+        self.client.force_authenticate(self.user)
+        self.client.delete(reverse('partner-detail', kwargs={'pk': self.partner.id}))
+        self.client.post(
+            reverse('partner-bulk-restore'),
+            {'ids': [self.partner.id]},
+            format='json'
+        )
+        self.assertIsNone(AutoPartnerConnection.objects.get(partner=self.partner).deleted_at)
+        response = self.client.get(reverse('partner-detail', kwargs={'pk': self.partner.id}))
+        self.assertEqual(response.data['hozzarendelt_autok'], [self.auto.id])
+
+    def test_restore_keeps_independently_deleted_connections(self):
+        self.client.force_authenticate(self.user)
+        # removed before the partner was deleted
+        AutoPartnerConnection.objects.filter(partner=self.partner).soft_delete(now=1)
+        self.client.delete(reverse('partner-detail', kwargs={'pk': self.partner.id}))
+        self.client.post(reverse('partner-bulk-restore'), {'ids': [self.partner.id]}, format='json')
+        self.assertEqual(AutoPartnerConnection.objects.get(partner=self.partner).deleted_at, 1)
+
+    def test_restore_keeps_connections_of_deleted_autos(self):
+        self.client.force_authenticate(self.user)
+        now = 1000
+        Partner.objects.filter(id=self.partner.id).soft_delete(now=now)
+        Auto.objects.filter(id=self.auto.id).update(deleted_at=now)
+        Partner.objects.filter(id=self.partner.id).restore()
+        self.assertEqual(AutoPartnerConnection.objects.get(partner=self.partner).deleted_at, now)
+
+    def test_reassign_restores_connection(self):
+        self.client.force_authenticate(self.user)
+        AutoPartnerConnection.objects.filter(partner=self.partner).soft_delete()
+        response = self.client.post(
+            reverse('auto-detail', kwargs={'pk': self.auto.id}),
+            {'partner': [self.partner.id, self.partner2.id]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, [
+            {'partner': self.partner.id, 'status': 'restored'},
+            {'partner': self.partner2.id, 'status': 'exists'},
+        ])
+        self.assertEqual(AutoPartnerConnection.alive.count(), 2)
+
+
 class AutoPartnerConnectionCreateTest(APITestCase):
     """
     Test Module for creation of AutoPartnerConnection
@@ -793,6 +1045,30 @@ class AutoPartnerConnectionCreateTest(APITestCase):
             self.partner
         )
 
+    def test_create_existing_autopartner(self):
+        AutoPartnerConnection.objects.create(auto=self.auto, partner=self.partner)
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            reverse('auto-detail', kwargs={'pk': self.auto.id}),
+            {"partner": self.partner.id},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_restores_cascaded_autopartner(self):
+        AutoPartnerConnection.objects.create(auto=self.auto, partner=self.partner)
+        Partner.objects.filter(id=self.partner.id).soft_delete()
+        Partner.objects.filter(id=self.partner.id).update(deleted_at=None)
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            reverse('auto-detail', kwargs={'pk': self.auto.id}),
+            {"partner": self.partner.id},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['partner'], self.partner.id)
+        self.assertEqual(AutoPartnerConnection.alive.count(), 1)
+
     def test_create_invalid_partner_id(self):
         data = {
             "partner": 99
@@ -818,6 +1094,109 @@ class AutoPartnerConnectionCreateTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
+class AutoPartnerConnectionBulkCreateTest(APITestCase):
+    """
+    Test Module for connecting a list of partners to an auto
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="user1", email="user1@test.com", password="password1")
+        self.client = APIClient()
+
+        self.auto = Auto.objects.create(
+            average_fuel=12.3,
+            delegation_starting=0,
+            delegation_ending=123,
+            driver='Bela',
+            owner='Bela2',
+            type='Magán'
+        )
+        self.partnerek = [
+            Partner.objects.create(
+                name='Bolt%d' % i,
+                city='LA',
+                address='4035 Cím utca 8',
+                company_name='Bolt1'
+            )
+            for i in range(3)
+        ]
+        AutoPartnerConnection.objects.create(
+            auto=self.auto,
+            partner=self.partnerek[0]
+        )
+
+    def test_create_autopartner_list(self):
+        data = {
+            "partner": [partner.id for partner in self.partnerek] + [99]
+        }
+        self.client.force_authenticate(self.user)
+        # auto, partners, connections, one INSERT and its savepoint
+        with self.assertNumQueries(6):
+            response = self.client.post(
+                reverse('auto-detail', kwargs={'pk': self.auto.id}),
+                data,
+                format='json',
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, [
+            {'partner': self.partnerek[0].id, 'status': 'exists'},
+            {'partner': self.partnerek[1].id, 'status': 'created'},
+            {'partner': self.partnerek[2].id, 'status': 'created'},
+            {'partner': 99, 'status': 'not_found'},
+        ])
+        self.assertEqual(
+            AutoPartnerConnection.objects.filter(auto=self.auto).count(),
+            3
+        )
+
+    def test_create_autopartner_list_nothing_new(self):
+        data = {
+            "partner": [self.partnerek[0].id, self.partnerek[0].id]
+        }
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            reverse('auto-detail', kwargs={'pk': self.auto.id}),
+            data,
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [
+            {'partner': self.partnerek[0].id, 'status': 'exists'},
+        ])
+
+    def test_create_autopartner_list_not_found(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            reverse('auto-detail', kwargs={'pk': self.auto.id}),
+            {"partner": [9999, 8888]},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, [
+            {'partner': 9999, 'status': 'not_found'},
+            {'partner': 8888, 'status': 'not_found'},
+        ])
+
+    def test_create_autopartner_list_exists_and_not_found(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            reverse('auto-detail', kwargs={'pk': self.auto.id}),
+            {"partner": [self.partnerek[0].id, 9999]},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_create_autopartner_list_invalid(self):
+        self.client.force_authenticate(self.user)
+        for partner in [[], ['abc']]:
+            response = self.client.post(
+                reverse('auto-detail', kwargs={'pk': self.auto.id}),
+                {"partner": partner},
+                format='json',
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
 class AutoPartnerNestFlatTest(APITestCase):
     """
     Test module for cheking query GET parameter
@@ -1002,13 +1381,13 @@ class AutoPartnerDeleteTest(APITestCase):
         response = self.client.get(reverse('auto-list'))
         autok = Auto.objects.filter(deleted_at=None)
         serializer = AutoSerializer(autok, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
         self.assertNotEqual(self.auto_list, response.data)
 
         response = self.client.get(reverse('partner-list'))
         partnerek = Partner.objects.filter(deleted_at=None)
         serializer = PartnerSerializer(partnerek, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
         self.assertNotEqual(self.partner_list, response.data)
 
     def test_delete_partner(self):
@@ -1030,16 +1409,1442 @@ class AutoPartnerDeleteTest(APITestCase):
         response = self.client.get(reverse('auto-list'))
         autok = Auto.objects.filter(deleted_at=None)
         serializer = AutoSerializer(autok, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
         self.assertNotEqual(self.auto_list, response.data)
 
         response = self.client.get(reverse('partner-list'))
         partnerek = Partner.objects.filter(deleted_at=None)
         serializer = PartnerSerializer(partnerek, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
         self.assertNotEqual(self.partner_list, response.data)
 
 
+class AutoPartnerQueryCountTest(APITestCase):
+    """
+    Test module for checking that list and detail endpoints load the
+    relationships in a fixed number of queries
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="user1", email="user1@test.com", password="password1")
+        self.client = APIClient()
+
+        self.partnerek = [
+            Partner.objects.create(
+                name='Bolt%d' % i,
+                city='LA',
+                address='4035 Cím utca 8',
+                company_name='Bolt1'
+            )
+            for i in range(3)
+        ]
+        self.autok = [
+            Auto.objects.create(
+                average_fuel=12.3,
+                delegation_starting=0,
+                delegation_ending=123,
+                driver='Bela',
+                owner='Bela%d' % i,
+                type='Magán'
+            )
+            for i in range(5)
+        ]
+        for auto in self.autok:
+            for partner in self.partnerek:
+                AutoPartnerConnection.objects.create(auto=auto, partner=partner)
+
+    def test_auto_list_flat_query_count(self):
+        self.client.force_authenticate(self.user)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('auto-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['results'][0]['hozzarendelt_partnerek'],
+            [partner.id for partner in self.partnerek]
+        )
+
+    def test_auto_list_nested_query_count(self):
+        self.client.force_authenticate(self.user)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('auto-list'), {'query': 'nested'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['results'][0]['hozzarendelt_partnerek'][0]['hozzarendelt_autok'],
+            [auto.id for auto in self.autok]
+        )
+
+    def test_partner_list_flat_query_count(self):
+        self.client.force_authenticate(self.user)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('partner-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['results'][0]['hozzarendelt_autok'],
+            [auto.id for auto in self.autok]
+        )
+
+    def test_partner_list_nested_query_count(self):
+        self.client.force_authenticate(self.user)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('partner-list'), {'query': 'nested'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_auto_detail_nested_query_count(self):
+        self.client.force_authenticate(self.user)
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                reverse('auto-detail', kwargs={'pk': self.autok[0].id}),
+                {'query': 'nested'}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['hozzarendelt_partnerek']), 3)
+
+
+class AutoPartnerDepthTest(APITestCase):
+    """
+    Test module for the ?depth= expansion of the relationship fields
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="user1", email="user1@test.com", password="password1")
+        self.client = APIClient()
+
+        self.auto = Auto.objects.create(
+            average_fuel=12.3,
+            delegation_starting=0,
+            delegation_ending=123,
+            driver='Bela',
+            owner='Bela1',
+            type='Magán'
+        )
+        self.auto2 = Auto.objects.create(
+            average_fuel=12.3,
+            delegation_starting=0,
+            delegation_ending=123,
+            driver='Bela',
+            owner='Bela2',
+            type='Magán'
+        )
+        self.partner = Partner.objects.create(
+            name='Bolt1',
+            city='LA',
+            address='4035 Cím utca 8',
+            company_name='Bolt1'
+        )
+        AutoPartnerConnection.objects.create(auto=self.auto, partner=self.partner)
+        AutoPartnerConnection.objects.create(auto=self.auto2, partner=self.partner)
+
+    def test_depth_one_matches_nested(self):
+        self.client.force_authenticate(self.user)
+        response_nested = self.client.get(reverse('auto-list'), {'query': 'nested'})
+        response_depth = self.client.get(reverse('auto-list'), {'depth': 1})
+        self.assertEqual(response_nested.data, response_depth.data)
+
+    def test_depth_two_one_query_per_level(self):
+        self.client.force_authenticate(self.user)
+        # autos and 3 levels of connections
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('auto-list'), {'depth': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        partner = response.data['results'][0]['hozzarendelt_partnerek'][0]
+        self.assertEqual(partner['id'], self.partner.id)
+        # the parent auto stays an id, the sibling auto is expanded
+        self.assertEqual(partner['hozzarendelt_autok'][0], self.auto.id)
+        self.assertEqual(partner['hozzarendelt_autok'][1]['id'], self.auto2.id)
+        self.assertEqual(
+            partner['hozzarendelt_autok'][1]['hozzarendelt_partnerek'],
+            [self.partner.id]
+        )
+
+    def test_depth_is_capped(self):
+        self.client.force_authenticate(self.user)
+        response_max = self.client.get(
+            reverse('partner-detail', kwargs={'pk': self.partner.id}),
+            {'depth': settings.NESTED_MAX_DEPTH}
+        )
+        response = self.client.get(
+            reverse('partner-detail', kwargs={'pk': self.partner.id}),
+            {'depth': 100}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, response_max.data)
+
+    def test_invalid_depth(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('auto-list'), {'depth': 'deep'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('auto-list'), {'depth': -1})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AutoPartnerIdentityMapTest(APITestCase):
+    """
+    Test module for checking that every object is serialized once per response
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="user1", email="user1@test.com", password="password1")
+        self.client = APIClient()
+
+        partnerek = [
+            Partner.objects.create(
+                name='Bolt%d' % i,
+                city='LA',
+                address='4035 Cím utca 8',
+                company_name='Bolt1'
+            )
+            for i in range(3)
+        ]
+        for i in range(5):
+            auto = Auto.objects.create(
+                average_fuel=12.3,
+                delegation_starting=0,
+                delegation_ending=123,
+                driver='Bela',
+                owner='Bela%d' % i,
+                type='Magán'
+            )
+            for partner in partnerek:
+                AutoPartnerConnection.objects.create(auto=auto, partner=partner)
+
+    def count_representations(self, url, params):
+        to_representation = Serializer.to_representation
+        with mock.patch.object(
+            Serializer,
+            'to_representation',
+            autospec=True,
+            side_effect=to_representation
+        ) as patched:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, patched.call_count
+
+    def test_nested_auto_list(self):
+        self.client.force_authenticate(self.user)
+        response, count = self.count_representations(
+            reverse('auto-list'),
+            {'query': 'nested'}
+        )
+        # 5 autos and 3 shared partners
+        self.assertEqual(count, 8)
+        self.assertEqual(
+            response.data['results'][0]['hozzarendelt_partnerek'],
+            response.data['results'][4]['hozzarendelt_partnerek']
+        )
+
+    def test_depth_two_partner_list(self):
+        self.client.force_authenticate(self.user)
+        response, count = self.count_representations(
+            reverse('partner-list'),
+            {'depth': 2}
+        )
+        self.assertEqual(count, 8)
+        self.assertEqual(len(response.data['results']), 3)
+
+
+class AutoPartnerPaginationTest(APITestCase):
+    """
+    Test module for the cursor pagination of the list endpoints
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="user1", email="user1@test.com", password="password1")
+        self.client = APIClient()
+
+        self.autok = [
+            Auto.objects.create(
+                average_fuel=12.3,
+                delegation_starting=0,
+                delegation_ending=123,
+                driver='Bela',
+                owner='Bela%d' % i,
+                type='Magán'
+            )
+            for i in range(5)
+        ]
+        Partner.objects.create(
+            name='Bolt1', city='LA', address='4035 Cím utca 8', company_name='Bolt1')
+
+    def test_page_through_autos(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('auto-list'), {'page_size': 2})
+        ids = []
+        # autos and partners of every page
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 2)
+            ids.extend(auto['id'] for auto in response.data['results'])
+            if response.data['next'] is None:
+                break
+            with self.assertNumQueries(2):
+                response = self.client.get(response.data['next'])
+
+        self.assertEqual(ids, [auto.id for auto in self.autok])
+
+    def test_page_size(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('auto-list'), {'page_size': 3})
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIsNotNone(response.data['next'])
+        self.assertIsNone(response.data['previous'])
+
+    def test_partner_list_paginated(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('partner-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+
+    def test_invalid_cursor(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('auto-list'), {'cursor': 'nope'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class AutoPartnerStreamTest(APITestCase):
+    """
+    Test module for the ?stream=1 export of the list endpoints
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="user1", email="user1@test.com", password="password1")
+        self.client = APIClient()
+
+        partner = Partner.objects.create(
+            name='Bolt1', city='LA', address='4035 Cím utca 8', company_name='Bolt1')
+        for i in range(5):
+            auto = Auto.objects.create(
+                average_fuel=12.3,
+                delegation_starting=0,
+                delegation_ending=123,
+                driver='Bela',
+                owner='Bela%d' % i,
+                type='Magán'
+            )
+            AutoPartnerConnection.objects.create(auto=auto, partner=partner)
+        Auto.objects.filter(owner='Bela4').soft_delete()
+
+    @override_settings(STREAM_CHUNK_SIZE=2)
+    def test_stream_autos(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('auto-list'), {'stream': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+
+        # 2 queries per chunk of 2 autos, 1 for the empty last chunk
+        with self.assertNumQueries(5):
+            content = b''.join(response.streaming_content)
+        serializer = AutoSerializer(Auto.objects.filter(deleted_at=None), many=True)
+        self.assertEqual(
+            json.loads(content.decode()),
+            json.loads(JSONRenderer().render(serializer.data).decode())
+        )
+
+    def test_stream_nested_partners(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(
+            reverse('partner-list'),
+            {'stream': 1, 'query': 'nested'}
+        )
+        data = json.loads(b''.join(response.streaming_content).decode())
+        self.assertEqual(len(data), 1)
+        self.assertEqual(len(data[0]['hozzarendelt_autok']), 4)
+
+    def test_stream_empty(self):
+        Partner.objects.all().delete()
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('partner-list'), {'stream': 1})
+        self.assertEqual(b''.join(response.streaming_content), b'[]')
+
+
+class AliveManagerTest(APITestCase):
+    """
+    Test module for the manager of the not soft deleted rows
+    """
+
+    def test_alive_excludes_deleted(self):
+        partner = Partner.objects.create(
+            name='Bolt1', city='LA', address='4035 Cím utca 8', company_name='Bolt1')
+        deleted = Partner.objects.create(
+            name='Bolt2', city='LA', address='4035 Cím utca 8', company_name='Bolt1')
+        deleted.delete_now()
+        deleted.save()
+
+        self.assertEqual(list(Partner.alive.all()), [partner])
+        self.assertEqual(Partner.objects.count(), 2)
+
+
+class BulkCreateTest(APITestCase):
+    """
+    Test module for creating a list of partners or autos in one request
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="user1", email="user1@test.com", password="password1")
+        self.client = APIClient()
+
+    def test_bulk_create_partners(self):
+        data = [
+            {
+                "name": "name%d" % i,
+                "city": "city",
+                "address": "address",
+                "company_name": "company_name"
+            }
+            for i in range(3)
+        ]
+        self.client.force_authenticate(self.user)
+        response = self.client.post(reverse('partner-list'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            response.data,
+            list(Partner.objects.order_by('id').values_list('id', flat=True))
+        )
+        self.assertEqual(
+            [Partner.objects.get(id=pk).name for pk in response.data],
+            ['name0', 'name1', 'name2']
+        )
+
+    def test_bulk_create_autos(self):
+        data = [
+            {
+                "average_fuel": "12.3",
+                "delegation_starting": "0",
+                "delegation_ending": "123",
+                "driver": "Bela%d" % i,
+                "owner": "Bela",
+                "type": "Magán"
+            }
+            for i in range(3)
+        ]
+        self.client.force_authenticate(self.user)
+        response = self.client.post(reverse('auto-list'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(Auto.objects.count(), 3)
+        self.assertEqual(Auto.objects.get(id=response.data[2]).driver, 'Bela2')
+
+    def test_bulk_create_invalid_item(self):
+        data = [
+            {
+                "name": "name",
+                "city": "city",
+                "address": "address",
+                "company_name": "company_name"
+            },
+            {
+                "name": "name"
+            }
+        ]
+        self.client.force_authenticate(self.user)
+        response = self.client.post(reverse('partner-list'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('city', response.data[1])
+        self.assertEqual(Partner.objects.count(), 0)
+
+    def test_bulk_create_no_auth(self):
+        response = self.client.post(reverse('partner-list'), [], format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ResponseCacheTest(APITestCase):
+    """
+    Test module for the versioned cache of the GET responses
+    """
+
+    def setUp(self):
+        get_response_cache().clear()
+        get_version_cache().clear()
+        self.user = User.objects.create_user(username="user1", email="user1@test.com", password="password1")
+        self.client = APIClient()
+        self.partner = Partner.objects.create(
+            name='Bolt1', city='LA', address='4035 Cím utca 8', company_name='Bolt1')
+
+    def test_versions_are_not_response_entries(self):
+        self.assertIsNot(get_response_cache(), get_version_cache())
+        self.client.force_authenticate(self.user)
+        self.client.get(reverse('partner-list'))
+        get_response_cache().clear()
+        self.assertIsNotNone(get_version_cache().get(model_version_key(Partner)))
+
+    @override_settings(RESPONSE_CACHE_ENABLED=False)
+    def test_disabled(self):
+        self.client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as first:
+            self.client.get(reverse('partner-list'))
+        with CaptureQueriesContext(connection) as second:
+            self.client.get(reverse('partner-list'))
+        self.assertEqual(len(first), len(second))
+
+    def test_cached_list(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('partner-list'))
+        # no query at all
+        with self.assertNumQueries(0):
+            response_cached = self.client.get(reverse('partner-list'))
+        self.assertEqual(response.data, response_cached.data)
+
+        # other query parameters are cached separately
+        with self.assertNumQueries(2):
+            self.client.get(reverse('partner-list'), {'query': 'nested'})
+
+    def test_save_invalidates(self):
+        self.client.force_authenticate(self.user)
+        self.client.get(reverse('partner-list'))
+        Partner.objects.create(
+            name='Bolt2', city='LA', address='4035 Cím utca 8', company_name='Bolt1')
+        response = self.client.get(reverse('partner-list'))
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_soft_delete_invalidates(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(
+            reverse('partner-detail', kwargs={'pk': self.partner.id})
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.delete(reverse('partner-detail', kwargs={'pk': self.partner.id}))
+        response = self.client.get(
+            reverse('partner-detail', kwargs={'pk': self.partner.id})
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_connection_invalidates(self):
+        auto = Auto.objects.create(
+            average_fuel=12.3,
+            delegation_starting=0,
+            delegation_ending=123,
+            driver='Bela',
+            owner='Bela1',
+            type='Magán'
+        )
+        self.client.force_authenticate(self.user)
+        self.client.get(reverse('auto-list'))
+        self.client.post(
+            reverse('auto-detail', kwargs={'pk': auto.id}),
+            {'partner': [self.partner.id]},
+            format='json'
+        )
+        response = self.client.get(reverse('auto-list'))
+        self.assertEqual(
+            response.data['results'][0]['hozzarendelt_partnerek'],
+            [self.partner.id]
+        )
+
+    def test_no_auth_not_cached(self):
+        self.client.force_authenticate(self.user)
+        self.client.get(reverse('partner-list'))
+        self.client.force_authenticate(None)
+        response = self.client.get(reverse('partner-list'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ConditionalGetTest(APITestCase):
+    """
+    Test module for ETag / Last-Modified validation of the GET endpoints
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="user1", email="user1@test.com", password="password1")
+        self.client = APIClient()
+        self.partner = Partner.objects.create(
+            name='Bolt1', city='LA', address='4035 Cím utca 8', company_name='Bolt1')
+
+    def test_if_none_match(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('partner-list'))
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                reverse('partner-list'),
+                HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_modified_since(self):
+        self.client.force_authenticate(self.user)
+        url = reverse('partner-detail', kwargs={'pk': self.partner.id})
+        response = self.client.get(url)
+        response = self.client.get(
+            url,
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_changes(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('partner-list'))
+        etag = response['ETag']
+
+        response = self.client.get(reverse('partner-list'), {'query': 'nested'})
+        self.assertNotEqual(response['ETag'], etag)
+
+        Partner.objects.create(
+            name='Bolt2', city='LA', address='4035 Cím utca 8', company_name='Bolt1')
+        response = self.client.get(
+            reverse('partner-list'),
+            HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_etag_changes_within_a_second(self):
+        self.client.force_authenticate(self.user)
+        url = reverse('partner-detail', kwargs={'pk': self.partner.id})
+        etag = self.client.get(url)['ETag']
+
+        # same row count and modify_at
+        Partner.objects.filter(pk=self.partner.id).update(city='NY')
+        Partner.objects.filter(pk=self.partner.id).update(city='LA')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_no_auth(self):
+        self.client.force_authenticate(self.user)
+        etag = self.client.get(reverse('partner-list'))['ETag']
+        self.client.force_authenticate(None)
+        response = self.client.get(
+            reverse('partner-list'),
+            HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ChangesTest(APITestCase):
+    """
+    Test module for the delta sync endpoints
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="user1", email="user1@test.com", password="password1")
+        self.client = APIClient()
+
+        self.autok = [
+            Auto.objects.create(
+                average_fuel=12.3,
+                delegation_starting=0,
+                delegation_ending=123,
+                driver='Bela',
+                owner='Bela%d' % i,
+                type='Magán'
+            )
+            for i in range(3)
+        ]
+        self.partner = Partner.objects.create(
+            name='Bolt1', city='LA', address='4035 Cím utca 8', company_name='Bolt1')
+        AutoPartnerConnection.objects.create(auto=self.autok[2], partner=self.partner)
+        Auto.objects.filter(id=self.autok[0].id).update(modify_at=100)
+        Auto.objects.filter(id=self.autok[1].id).update(modify_at=200)
+        Auto.objects.filter(id=self.autok[2].id).update(modify_at=300, deleted_at=300)
+        AutoPartnerConnection.objects.update(modify_at=300, deleted_at=300)
+
+    def test_auto_changes(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('auto-changes'), {'since': 100})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['since'], 100)
+        self.assertEqual(
+            [auto['id'] for auto in response.data['changed']],
+            [self.autok[1].id]
+        )
+        self.assertEqual(
+            response.data['deleted'],
+            [{'id': self.autok[2].id, 'deleted_at': 300}]
+        )
+
+    def test_watermark(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('auto-changes'), {'since': 0})
+        self.assertEqual(len(response.data['changed']), 2)
+
+        response = self.client.get(
+            reverse('auto-changes'),
+            {'since': response.data['watermark']}
+        )
+        self.assertEqual(response.data['changed'], [])
+        self.assertEqual(response.data['deleted'], [])
+
+    @override_settings(CHANGES_WATERMARK_LAG=60)
+    def test_watermark_lag(self):
+        self.client.force_authenticate(self.user)
+        now = int(time.time())
+        Auto.objects.filter(id=self.autok[0].id).update(modify_at=now - 90)
+        # may belong to a transaction that is not committed yet
+        Auto.objects.filter(id=self.autok[1].id).update(modify_at=now - 30)
+
+        response = self.client.get(reverse('auto-changes'), {'since': 0})
+        self.assertLessEqual(response.data['watermark'], now - 60)
+        self.assertEqual([auto['id'] for auto in response.data['changed']], [self.autok[0].id])
+
+    def test_connection_changes(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('kapcsolat-changes'), {'since': 0})
+        self.assertEqual(response.data['changed'], [])
+        self.assertEqual(len(response.data['deleted']), 1)
+
+    def test_partner_changes_require_since(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('partner-changes'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_changes_no_auth(self):
+        response = self.client.get(reverse('auto-changes'), {'since': 0})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class SparseFieldsTest(APITestCase):
+    """
+    Test module for the ?fields= and ?exclude= query parameters
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="user1", email="user1@test.com", password="password1")
+        self.client = APIClient()
+
+        self.auto = Auto.objects.create(
+            average_fuel=12.3,
+            delegation_starting=0,
+            delegation_ending=123,
+            driver='Bela',
+            owner='Bela1',
+            type='Magán'
+        )
+        self.partner = Partner.objects.create(
+            name='Bolt1', city='LA', address='4035 Cím utca 8', company_name='Bolt1')
+        AutoPartnerConnection.objects.create(auto=self.auto, partner=self.partner)
+
+    def test_fields(self):
+        self.client.force_authenticate(self.user)
+        # only the autos, the relationship is not loaded
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                reverse('auto-list'),
+                {'fields': 'id,driver,type'}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [
+            {'id': self.auto.id, 'driver': 'Bela', 'type': 'Magán'}
+        ])
+
+    def test_exclude(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(
+            reverse('partner-detail', kwargs={'pk': self.partner.id}),
+            {'exclude': 'hozzarendelt_autok,created_at,modify_at,deleted_at'}
+        )
+        self.assertEqual(response.data, {
+            'id': self.partner.id,
+            'name': 'Bolt1',
+            'city': 'LA',
+            'address': '4035 Cím utca 8',
+            'company_name': 'Bolt1'
+        })
+
+    def test_fields_apply_to_top_level_only(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(
+            reverse('partner-list'),
+            {'fields': 'id,hozzarendelt_autok', 'query': 'nested'}
+        )
+        partner = response.data['results'][0]
+        self.assertEqual(list(partner), ['id', 'hozzarendelt_autok'])
+        self.assertEqual(
+            partner['hozzarendelt_autok'],
+            [AutoSerializer(self.auto).data]
+        )
+
+    def test_fields_apply_to_top_level_only_at_depth(self):
+        other = Auto.objects.create(
+            average_fuel=4.5,
+            delegation_starting=0,
+            delegation_ending=123,
+            driver='Anna',
+            owner='Anna1',
+            type='Céges'
+        )
+        AutoPartnerConnection.objects.create(auto=other, partner=self.partner)
+        self.client.force_authenticate(self.user)
+        response = self.client.get(
+            reverse('auto-detail', kwargs={'pk': self.auto.id}),
+            {'fields': 'id,hozzarendelt_partnerek', 'depth': 3}
+        )
+        self.assertEqual(list(response.data), ['id', 'hozzarendelt_partnerek'])
+        partner = response.data['hozzarendelt_partnerek'][0]
+        self.assertEqual(list(partner), list(PartnerSerializer.Meta.fields))
+        # level 2: the other auto of the partner, the auto of the path is an id
+        self.assertEqual(partner['hozzarendelt_autok'][0], self.auto.id)
+        self.assertEqual(list(partner['hozzarendelt_autok'][1]), list(AutoSerializer.Meta.fields))
+        self.assertEqual(partner['hozzarendelt_autok'][1]['driver'], 'Anna')
+
+    def test_unknown_fields(self):
+        self.client.force_authenticate(self.user)
+        for url in (reverse('auto-list'), reverse('partner-detail', kwargs={'pk': self.partner.id})):
+            response = self.client.get(url, {'fields': 'id,nincs'})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data, {'fields': ['Unknown fields: nincs.']})
+
+            response = self.client.get(url, {'exclude': 'nincs'})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data, {'exclude': ['Unknown fields: nincs.']})
+
+    def test_empty_fields(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('auto-list'), {'fields': ''})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'fields': ['Select at least one field.']})
+
+
+class ValuesListReaderTest(APITestCase):
+    """
+    Test module for the parity of the flat list fast path with the serializers
+    """
+
+    def setUp(self):
+        self.partnerek = [
+            Partner.objects.create(
+                name='Bolt%d' % i,
+                city='Győr',
+                address='4035 Cím utca 8',
+                company_name='Bolt1'
+            )
+            for i in range(3)
+        ]
+        for i, fuel in enumerate([5, 12.3, 99.9, Decimal('7.25'), 0]):
+            auto = Auto.objects.create(
+                average_fuel=fuel,
+                delegation_starting=i,
+                delegation_ending=123 + i,
+                driver='Béla',
+                owner='Bela%d' % i,
+                type='Céges' if i % 2 else 'Magán'
+            )
+            for partner in self.partnerek[:i]:
+                AutoPartnerConnection.objects.create(auto=auto, partner=partner)
+        Partner.objects.filter(id=self.partnerek[0].id).soft_delete()
+
+    def assertParity(self, model, serializer_class, context):
+        queryset = model.alive.order_by('id')
+        reader = ValuesListReader(serializer_class, context)
+        fast = reader.to_representation(reader.get_queryset(queryset))
+        serializer = serializer_class(
+            serializer_class.setup_queryset(queryset, context),
+            many=True,
+            context=context
+        )
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(fast), renderer.render(serializer.data))
+
+    def test_auto_parity(self):
+        self.assertParity(Auto, AutoSerializer, {'depth': 0})
+
+    def test_partner_parity(self):
+        self.assertParity(Partner, PartnerSerializer, {'depth': 0})
+
+    def test_sparse_parity(self):
+        self.assertParity(Auto, AutoSerializer, {
+            'depth': 0,
+            'fields': {'average_fuel', 'type', 'hozzarendelt_partnerek'}
+        })
+        self.assertParity(Partner, PartnerSerializer, {
+            'depth': 0,
+            'exclude': {'id', 'hozzarendelt_autok'}
+        })
+
+
+class RendererTest(APITestCase):
+    """
+    Test module for the output parity of FastJSONRenderer with JSONRenderer
+    """
+
+    def setUp(self):
+        self.data = {
+            'results': [{
+                'id': 1,
+                'city': 'Győr',
+                'address': '4035 Cím utca 8\u2028',
+                'average_fuel': Decimal('7.25'),
+                'type': ugettext_lazy('Céges'),
+                'hozzarendelt_partnerek': [1, 2],
+                'deleted_at': None
+            }],
+            'next': None
+        }
+        self.expected = JSONRenderer().render(self.data)
+
+    def test_fast_renderer(self):
+        renderer = renderers.FastJSONRenderer()
+        self.assertEqual(json.loads(renderer.render(self.data)), json.loads(self.expected))
+        self.assertNotIn('\u2028'.encode(), renderer.render(self.data))
+        self.assertIn('Győr'.encode(), renderer.render(self.data))
+        self.assertEqual(renderer.render(None), b'')
+
+    def test_fast_renderer_without_orjson(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(renderers.FastJSONRenderer().render(self.data), self.expected)
+
+    def test_indent_falls_back(self):
+        context = {'indent': 2}
+        self.assertEqual(
+            renderers.FastJSONRenderer().render(self.data, renderer_context=context),
+            JSONRenderer().render(self.data, renderer_context=context)
+        )
+
+
+class LoggingMiddlewareTest(APITestCase):
+    """
+    Test module for the queue backed request logging
+    """
+
+    def setUp(self):
+        User.objects.create_user(username="user1", password="1234")
+        self.client = APIClient()
+        self.client.login(username="user1", password="1234")
+        self.stream = io.StringIO()
+        self.handler = log.QueueStreamHandler(self.stream)
+        self.handlers = middleware.logger.handlers
+        middleware.logger.handlers = [self.handler]
+        logging.disable(logging.NOTSET)
+
+    def tearDown(self):
+        logging.disable(logging.CRITICAL)
+        middleware.logger.handlers = self.handlers
+        self.handler.close()
+
+    def flush(self):
+        self.handler.stop()
+        return self.stream.getvalue()
+
+    def test_request_is_logged(self):
+        self.client.get(reverse('partner-list'), {'query': 'flat'})
+        output = self.flush()
+        self.assertIn("'endpoint': '/partner/?query=flat'", output)
+        self.assertIn("'method': 'GET'", output)
+
+    def test_message_is_built_by_writer(self):
+        with mock.patch.object(middleware.RequestLogMessage, '__str__', return_value='msg') as to_str:
+            self.client.get(reverse('partner-list'))
+            self.handler.queue.join()
+            self.assertEqual(to_str.call_count, 1)
+        self.assertEqual(self.flush(), 'msg\n')
+
+    def test_disabled_level_skips_message(self):
+        logging.disable(logging.INFO)
+        with mock.patch.object(middleware, 'RequestLogMessage') as message:
+            self.client.get(reverse('partner-list'))
+        message.assert_not_called()
+
+    @override_settings(LOG_BODY_MAX_LENGTH=21)
+    def test_body_is_capped(self):
+        self.client.get(reverse('partner-list'), {'name': 'x' * 100})
+        self.assertIn("'request': 'POST: <QueryDict: {}>...'", self.flush())
+
+    @override_settings(LOG_SAMPLE_RATES={'/partner/': 0, '/partner/changes/': 1})
+    def test_sampling(self):
+        self.client.get(reverse('partner-list'))
+        self.client.get(reverse('auto-list'))
+        self.client.get(reverse('partner-changes'), {'since': 0})
+        output = self.flush()
+        self.assertNotIn("'endpoint': '/partner/'", output)
+        self.assertIn("'endpoint': '/auto/'", output)
+        self.assertIn("'endpoint': '/partner/changes/?since=0'", output)
+
+    def test_full_queue_drops_records(self):
+        handler = log.QueueStreamHandler(io.StringIO(), maxsize=1)
+        handler.enqueue(logging.makeLogRecord({'msg': 'first'}))
+        handler.enqueue(logging.makeLogRecord({'msg': 'second'}))
+        self.assertEqual(handler.dropped, 1)
+        handler.close()
+
+    def test_dropped_are_reported(self):
+        stream = io.StringIO()
+        handler = log.QueueStreamHandler(stream, maxsize=1)
+        handler.start()
+        with mock.patch.object(handler.queue, 'put_nowait', side_effect=queue.Full):
+            handler.emit(logging.makeLogRecord({'msg': 'dropped'}))
+        handler.close()
+        self.assertEqual(stream.getvalue(), 'Log queue full, 1 records dropped\n')
+
+    def test_one_listener_per_process(self):
+        handler = log.QueueStreamHandler(io.StringIO())
+        barrier = threading.Barrier(8)
+        start = handler.start
+
+        def slow_start():
+            # every thread is past the first pid check by now
+            time.sleep(0.05)
+            start()
+
+        def emit():
+            barrier.wait()
+            handler.emit(logging.makeLogRecord({'msg': 'first', 'levelno': logging.INFO}))
+
+        with mock.patch.object(handler, 'start', side_effect=slow_start) as started:
+            threads = [threading.Thread(target=emit) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        handler.close()
+        self.assertEqual(started.call_count, 1)
+
+
+class MetricsTest(APITestCase):
+    """
+    Test module for the per url name request metrics
+    """
+
+    def setUp(self):
+        User.objects.create_user(username="user1", password="1234")
+        self.client = APIClient()
+        self.client.login(username="user1", password="1234")
+        Partner.objects.create(name='Bolt', city='Győr', address='4035 Cím utca 8', company_name='Bolt1')
+        metrics.registry.reset()
+
+    def get_sample(self, view, method='GET'):
+        return next(
+            sample for sample in metrics.registry.snapshot()
+            if sample['view'] == view and sample['method'] == method
+        )
+
+    def test_request_is_recorded(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('partner-list'))
+        self.client.get(reverse('partner-list'))
+
+        sample = self.get_sample('partner-list')
+        self.assertEqual(sample['count'], 2)
+        self.assertEqual(sum(sample['buckets']), 2)
+        self.assertGreater(sample['seconds'], 0)
+        self.assertGreater(sample['db_seconds'], 0)
+        self.assertGreaterEqual(sample['db_queries'], len(queries))
+        self.assertGreaterEqual(sample['response_bytes'], len(response.content))
+
+    def test_unmatched_url(self):
+        self.client.get('/nincs/')
+        self.assertEqual(self.get_sample('unmatched')['count'], 1)
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('auto-list'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+        content = response.content.decode()
+        self.assertIn('# TYPE roadrecord_request_duration_seconds histogram', content)
+        self.assertIn('roadrecord_request_duration_seconds_bucket{view="auto-list",method="GET",le="+Inf"} 1', content)
+        self.assertIn('roadrecord_request_duration_seconds_count{view="auto-list",method="GET"} 1', content)
+        self.assertIn('roadrecord_request_db_queries_total{view="auto-list",method="GET"}', content)
+        self.assertIn('roadrecord_response_bytes_total{view="auto-list",method="GET"}', content)
+
+    def test_workers_are_merged(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            self.client.get(reverse('auto-list'))
+            # dump of another worker
+            other = dict(self.get_sample('auto-list'), count=4, buckets=[0] * 11 + [4])
+            with open(os.path.join(directory, '1.json'), 'w') as f:
+                json.dump([other], f)
+
+            sample = next(sample for sample in metrics.registry.collect() if sample['view'] == 'auto-list')
+            self.assertEqual(sample['count'], 5)
+            self.assertEqual(sample['buckets'][-1], 4 + self.get_sample('auto-list')['buckets'][-1])
+            self.assertTrue(os.path.exists(os.path.join(directory, '%d.json' % os.getpid())))
+
+    def test_retire_worker(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            self.client.get(reverse('auto-list'))
+            sample = dict(self.get_sample('auto-list'), count=2, buckets=[0] * 11 + [2])
+            for name in ('1.json', 'retired.json'):
+                with open(os.path.join(directory, name), 'w') as f:
+                    json.dump([sample], f)
+
+            metrics.retire_worker(directory, 1)
+            self.assertFalse(os.path.exists(os.path.join(directory, '1.json')))
+            with open(os.path.join(directory, 'retired.json')) as f:
+                self.assertEqual(json.load(f)[0]['count'], 4)
+            sample = next(sample for sample in metrics.registry.collect() if sample['view'] == 'auto-list')
+            self.assertEqual(sample['count'], 5)
+
+            # already retired
+            metrics.retire_worker(directory, 1)
+
+    def test_concurrent_flushes(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(METRICS_DIR=directory, METRICS_FLUSH_INTERVAL=0):
+            def observe():
+                for _ in range(50):
+                    metrics.registry.observe('auto-list', 'GET', 0.01, 1, 0.001, 100)
+
+            threads = [threading.Thread(target=observe) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            metrics.registry.flush()
+            self.assertEqual(os.listdir(directory), ['%d.json' % os.getpid()])
+            self.assertEqual(self.get_sample('auto-list')['count'], 400)
+
+    def test_failed_flush_is_ignored(self):
+        logging.disable(logging.NOTSET)
+        self.addCleanup(logging.disable, logging.CRITICAL)
+        with override_settings(METRICS_DIR='/nincs/ilyen/mappa', METRICS_FLUSH_INTERVAL=0), \
+                self.assertLogs('roadrecord.metrics', 'WARNING'):
+            metrics.registry.observe('auto-list', 'GET', 0.01, 1, 0.001, 100)
+        self.assertEqual(self.get_sample('auto-list')['count'], 1)
+
+
+@override_settings(QUERY_INSPECTION=True, QUERY_REPEAT_THRESHOLD=3, QUERY_SLOW_THRESHOLD_MS=1000)
+class QueryInspectionTest(APITestCase):
+    """
+    Test module for the slow and repeated query logging
+    """
+
+    def setUp(self):
+        User.objects.create_user(username="user1", password="1234")
+        self.client = APIClient()
+        self.client.login(username="user1", password="1234")
+        self.partnerek = [
+            Partner.objects.create(name='Bolt%d' % i, city='Győr', address='4035 Cím utca 8', company_name='Bolt1')
+            for i in range(3)
+        ]
+        # keep the request log quiet, only the query logger is under test
+        patcher = mock.patch.object(middleware.logger, 'disabled', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        logging.disable(logging.NOTSET)
+
+    def tearDown(self):
+        logging.disable(logging.CRITICAL)
+
+    def test_repeated_shapes(self):
+        inspector = middleware.QueryInspector(request=None)
+        with connection.execute_wrapper(inspector):
+            for partner in self.partnerek:
+                Partner.objects.get(pk=partner.pk)
+            list(Partner.objects.filter(pk__in=[1, 2]))
+            list(Partner.objects.filter(pk__in=[1, 2, 3]))
+        repeated = inspector.repeated()
+        self.assertEqual(len(repeated), 1)
+        self.assertEqual(repeated[0][1], 3)
+        self.assertIn('"apps_partner"."id" = %s', repeated[0][0])
+        # IN lists of any length share one shape
+        self.assertEqual(len(inspector.shapes), 2)
+
+    def test_list_has_no_repeated_queries(self):
+        for partner in self.partnerek:
+            auto = Auto.objects.create(average_fuel=5, delegation_starting=1, delegation_ending=2,
+                                       driver='Béla', owner='Bela', type='Céges')
+            AutoPartnerConnection.objects.create(auto=auto, partner=partner)
+        with self.assertLogs('roadrecord.queries', 'WARNING') as logs:
+            self.client.get(reverse('partner-list'), {'query': 'nested'})
+            query_logger = logging.getLogger('roadrecord.queries')
+            query_logger.warning('marker')
+        self.assertEqual(logs.output, ['WARNING:roadrecord.queries:marker'])
+
+    @override_settings(QUERY_SLOW_THRESHOLD_MS=0)
+    def test_slow_query(self):
+        with self.assertLogs('roadrecord.queries', 'WARNING') as logs:
+            self.client.get(reverse('partner-list'))
+        self.assertTrue(any('Slow query in partner-list' in line for line in logs.output))
+
+    def test_repeated_query_is_logged(self):
+        with mock.patch.object(middleware.QueryInspector, 'repeated', return_value=[('SELECT 1', 3)]):
+            with self.assertLogs('roadrecord.queries', 'WARNING') as logs:
+                self.client.get(reverse('auto-list'))
+        self.assertEqual(logs.output, ['WARNING:roadrecord.queries:Repeated query in auto-list (3 times): SELECT 1'])
+
+    @override_settings(QUERY_INSPECTION=False)
+    def test_disabled(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            middleware.QueryInspectionMiddleware(lambda request: None)
+
+
+class ConnectionPoolTest(APITestCase):
+    """
+    Test module for the pooled postgres connections, the pool is mocked
+    """
+
+    def setUp(self):
+        patcher = mock.patch.object(pool_backend.pool, 'ThreadedConnectionPool')
+        self.pool = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.addCleanup(pool_backend._pools.clear)
+        self.settings = {
+            'NAME': 'postgres', 'OPTIONS': {}, 'CONN_HEALTH_CHECKS': True,
+            'POOL': {'MAX_SIZE': 1, 'TIMEOUT': 0},
+        }
+
+    def get_wrapper(self):
+        return pool_backend.DatabaseWrapper(dict(self.settings), alias='pooltest')
+
+    def get_connection(self, closed=False, transaction_status=0):
+        conn = mock.MagicMock(closed=closed, autocommit=True)
+        conn.get_transaction_status.return_value = transaction_status
+        return conn
+
+    def test_checkout_and_return(self):
+        conn = self.get_connection()
+        self.pool.getconn.return_value = conn
+        wrapper = self.get_wrapper()
+
+        wrapper.connection = wrapper.get_new_connection({})
+        self.assertIs(wrapper.connection, conn)
+        # the only slot is taken
+        with self.assertRaises(OperationalError):
+            self.get_wrapper().get_new_connection({})
+
+        wrapper._close()
+        self.pool.putconn.assert_called_once_with(conn, close=False)
+        self.assertIs(self.get_wrapper().get_new_connection({}), conn)
+
+    def test_dead_connection_is_replaced(self):
+        dead, alive = self.get_connection(closed=True), self.get_connection()
+        self.pool.getconn.side_effect = [dead, alive]
+        self.assertIs(self.get_wrapper().get_new_connection({}), alive)
+        self.pool.putconn.assert_called_once_with(dead, close=True)
+
+    def test_open_transaction_is_rolled_back(self):
+        conn = self.get_connection(transaction_status=2)
+        self.pool.getconn.return_value = conn
+        wrapper = self.get_wrapper()
+        wrapper.connection = wrapper.get_new_connection({})
+        wrapper._close()
+        conn.rollback.assert_called_once_with()
+        self.pool.putconn.assert_called_once_with(conn, close=False)
+
+
+class CachedTokenAuthenticationTest(APITestCase):
+    """
+    Test module for the token authentication with the in-process user cache
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="user1", email="user1@test.com", password="password1")
+        self.client = APIClient()
+        response = self.client.post(reverse('login'), {'username': 'user1', 'password': 'password1'})
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + response.data['key'])
+        # token only, the login opens no session
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, self.client.cookies)
+        token_cache.clear()
+
+    def test_token_is_cached(self):
+        with CaptureQueriesContext(connection) as first:
+            response = self.client.get(reverse('partner-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with CaptureQueriesContext(connection) as second:
+            response = self.client.get(reverse('partner-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # no token and user lookup, no session lookup
+        self.assertEqual(len(first) - len(second), 1)
+        self.assertFalse(any('authtoken_token' in query['sql'] for query in second))
+        self.assertFalse(any('django_session' in query['sql'] for query in first))
+
+    def test_requests_get_their_own_instances(self):
+        request = mock.Mock(META={'HTTP_AUTHORIZATION': self.client._credentials['HTTP_AUTHORIZATION']})
+        authentication = CachedTokenAuthentication()
+        authentication.authenticate(request)
+        user, token = authentication.authenticate(request)
+        other_user, other_token = authentication.authenticate(request)
+        self.assertEqual(user, self.user)
+        self.assertIs(token.user, user)
+        self.assertIsNot(user, other_user)
+        self.assertIsNot(user._state, other_user._state)
+        self.assertIsNot(token._state.fields_cache, other_token._state.fields_cache)
+        with self.assertNumQueries(0):
+            self.assertEqual(token.user_id, self.user.pk)
+            self.assertTrue(user.is_active)
+
+    def test_invalid_token(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token nincs')
+        response = self.client.get(reverse('partner-list'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_logout_invalidates(self):
+        self.client.get(reverse('partner-list'))
+        response = self.client.post(reverse('logout'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(reverse('partner-list'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_deactivated_user_invalidates(self):
+        self.client.get(reverse('partner-list'))
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(reverse('partner-list'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_cache_is_bounded(self):
+        cache = TokenCache(maxsize=2, ttl=60)
+        cache.set('a', (self.user.pk, None, None))
+        cache.set('b', (self.user.pk, None, None))
+        cache.get('a')
+        cache.set('c', (self.user.pk, None, None))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_cache_expires(self):
+        cache = TokenCache(maxsize=2, ttl=60)
+        with mock.patch('utils.authentication.time.monotonic', return_value=0):
+            cache.set('a', (self.user.pk, None, None))
+        with mock.patch('utils.authentication.time.monotonic', return_value=59):
+            self.assertIsNotNone(cache.get('a'))
+        with mock.patch('utils.authentication.time.monotonic', return_value=60):
+            self.assertIsNone(cache.get('a'))
+
+
+class WarmUpTest(APITestCase):
+    """
+    Test module for the warm-up of the WSGI application
+    """
+
+    def setUp(self):
+        _converters.clear()
+        get_version_cache().clear()
+        logging.disable(logging.NOTSET)
+
+    def tearDown(self):
+        logging.disable(logging.CRITICAL)
+
+    def test_warm_up(self):
+        with self.assertLogs('roadrecord.warmup', 'INFO') as logs:
+            warmup.warm_up()
+        self.assertTrue(logs.output[0].startswith('INFO:roadrecord.warmup:Warm-up finished in'))
+        self.assertIn(AutoSerializer, _converters)
+        self.assertIn(PartnerSerializer, _converters)
+        self.assertIsNotNone(connection.connection)
+        self.assertIsNotNone(get_version_cache().get(model_version_key(Auto)))
+
+    def test_database_down(self):
+        error = OperationalError('could not connect to server')
+        with mock.patch.object(connection, 'ensure_connection', side_effect=error), \
+                self.assertLogs('roadrecord.warmup', 'INFO') as logs:
+            warmup.warm_up()
+        self.assertTrue(logs.output[0].startswith(
+            'ERROR:roadrecord.warmup:Warm-up step warm_up_connections failed, skipped'
+        ))
+        self.assertTrue(logs.output[1].startswith('INFO:roadrecord.warmup:Warm-up finished in'))
+        self.assertIn(AutoSerializer, _converters)
+
+
+class DelegationWindowTest(APITestCase):
+    """
+    Test module for the ?active_at= and ?overlaps= filters of the auto list
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="user1", email="user1@test.com", password="password1")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.autok = [
+            Auto.objects.create(
+                average_fuel=12.3,
+                delegation_starting=start,
+                delegation_ending=end,
+                driver='Bela',
+                owner='Bela%d' % i,
+                type='Magán'
+            )
+            for i, (start, end) in enumerate([(0, 100), (50, 150), (100, 200), (300, 400), (120, 130)])
+        ]
+        Auto.objects.filter(id=self.autok[4].id).soft_delete()
+
+    def get_ids(self, params):
+        response = self.client.get(reverse('auto-list'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [auto['id'] for auto in response.data['results']]
+
+    def test_active_at(self):
+        self.assertEqual(self.get_ids({'active_at': 100}), [auto.id for auto in self.autok[:3]])
+        self.assertEqual(self.get_ids({'active_at': 125}), [self.autok[1].id, self.autok[2].id])
+        self.assertEqual(self.get_ids({'active_at': 250}), [])
+
+    def test_overlaps(self):
+        self.assertEqual(self.get_ids({'overlaps': '160,300'}), [self.autok[2].id, self.autok[3].id])
+        self.assertEqual(self.get_ids({'overlaps': '201,299'}), [])
+        self.assertEqual(self.get_ids({'overlaps': '0,0', 'query': 'nested'}), [self.autok[0].id])
+
+    def test_combined(self):
+        self.assertEqual(self.get_ids({'active_at': 60, 'overlaps': '140,500'}), [self.autok[1].id])
+
+    def test_invalid(self):
+        for params in [{'active_at': 'ma'}, {'overlaps': '1'}, {'overlaps': '1,a'}, {'overlaps': '5,1'}]:
+            response = self.client.get(reverse('auto-list'), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_queryset(self):
+        self.assertEqual(set(Auto.alive.active_at(100)), set(self.autok[:3]))
+        self.assertEqual(set(Auto.objects.overlapping(120, 125)), {self.autok[1], self.autok[2], self.autok[4]})
+
+
+class DelegationConflictTest(APITestCase):
+    """
+    Test module for the overlapping delegations of the same driver
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="user1", email="user1@test.com", password="password1")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.autok = [
+            Auto.objects.create(
+                average_fuel=12.3,
+                delegation_starting=start,
+                delegation_ending=end,
+                driver=driver,
+                owner='Bela%d' % i,
+                type='Magán'
+            )
+            for i, (driver, start, end) in enumerate([
+                ('Béla', 0, 100),
+                ('Béla', 50, 60),
+                ('Béla', 100, 200),
+                ('Béla', 300, 400),
+                ('Anna', 0, 1000),
+                ('Anna', 900, 1000),
+                ('Béla', 55, 58),
+            ])
+        ]
+        Auto.objects.filter(id=self.autok[3].id).soft_delete()
+
+    def conflict(self, driver, auto, other_auto, start, end):
+        return {'driver': driver, 'auto': self.autok[auto].id, 'other_auto': self.autok[other_auto].id,
+                'start': start, 'end': end}
+
+    def test_conflicts(self):
+        response = self.client.get(reverse('auto-conflicts'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertCountEqual(json.loads(b''.join(response.streaming_content)), [
+            self.conflict('Anna', 4, 5, 900, 1000),
+            self.conflict('Béla', 0, 1, 50, 60),
+            self.conflict('Béla', 0, 6, 55, 58),
+            self.conflict('Béla', 1, 6, 55, 58),
+            self.conflict('Béla', 0, 2, 100, 100),
+        ])
+
+    def test_filters(self):
+        response = self.client.get(reverse('auto-conflicts'), {'driver': 'Béla', 'overlaps': '90,150'})
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), [
+            self.conflict('Béla', 0, 2, 100, 100),
+        ])
+        response = self.client.get(reverse('auto-conflicts'), {'driver': 'Nincs'})
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), [])
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('delegation_conflicts', driver='Anna', stdout=out)
+        self.assertEqual([json.loads(line) for line in out.getvalue().splitlines()], [
+            self.conflict('Anna', 4, 5, 900, 1000),
+        ])
+
+    def test_same_as_pairwise(self):
+        intervals = sorted(generate_intervals(2000, 50))
+        self.assertEqual(sum(1 for _ in find_conflicts(intervals)), find_conflicts_pairwise(intervals))
+
+
 # class AutoPartnerConnectionGetAllTest(APITestCase):
 #     """
 #     Test Module for GET all AutoPartnerConnection
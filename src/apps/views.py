@@ -1,13 +1,23 @@
 import time
 
+from django.conf import settings
+from django.db import transaction
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from utils.cache import cache_response
 
 from . import serializers
+from .conditional import conditional_response
+from .conflicts import find_conflicts, iterate_intervals
+from .readers import ValuesListReader
+from .streaming import streaming_list_response, streaming_rows_response
 
 from .models import (
     Auto,
@@ -16,24 +26,237 @@ from .models import (
 )
 
 
+def get_serializer_context(request):
+    """
+    Serializer context from the ?query=, ?depth=, ?fields= and ?exclude=
+    parameters, depth is capped at settings.NESTED_MAX_DEPTH
+    """
+    context = {
+        'query': request.query_params.get('query', 'flat')
+    }
+    depth = request.query_params.get('depth')
+    if depth is not None:
+        try:
+            depth = int(depth)
+        except ValueError:
+            raise ValidationError({'depth': ['A valid integer is required.']})
+        if depth < 0:
+            raise ValidationError({'depth': ['Ensure this value is greater than or equal to 0.']})
+        context['depth'] = min(depth, settings.NESTED_MAX_DEPTH)
+    context['depth'] = serializers.get_depth(context)
+    for param in ('fields', 'exclude'):
+        value = request.query_params.get(param)
+        if value is not None:
+            context[param] = {name.strip() for name in value.split(',') if name.strip()}
+    return context
+
+
+def filter_delegations(request, queryset):
+    """
+    Autos delegated at the ?active_at= moment and/or at any moment of the
+    ?overlaps=start,end interval
+    """
+    active_at = request.query_params.get('active_at')
+    if active_at is not None:
+        try:
+            queryset = queryset.active_at(int(active_at))
+        except ValueError:
+            raise ValidationError({'active_at': ['A valid integer is required.']})
+    overlaps = request.query_params.get('overlaps')
+    if overlaps is not None:
+        try:
+            start, end = [int(value) for value in overlaps.split(',')]
+        except ValueError:
+            raise ValidationError({'overlaps': ['Expected two integers: start,end.']})
+        if start > end:
+            raise ValidationError({'overlaps': ['The start must not be after the end.']})
+        queryset = queryset.overlapping(start, end)
+    return queryset
+
+
+def list_response(request, queryset, serializer_class, context):
+    """
+    Serialized list of the queryset:
+     - the whole queryset as a streamed JSON array for ?stream=1
+     - flat lists are read through the values_list() fast path
+     - one page of it when REST_FRAMEWORK['DEFAULT_PAGINATION_CLASS'] is set
+    """
+    if request.query_params.get('stream') in ('1', 'true'):
+        return streaming_list_response(
+            serializer_class.setup_queryset(queryset, context),
+            serializer_class,
+            context,
+            settings.STREAM_CHUNK_SIZE
+        )
+
+    if context['depth'] == 0:
+        reader = ValuesListReader(serializer_class, context)
+        queryset = reader.get_queryset(queryset)
+        serialize = reader.to_representation
+    else:
+        queryset = serializer_class.setup_queryset(queryset, context)
+
+        def serialize(rows):
+            return serializer_class(rows, many=True, context=context).data
+
+    pagination_class = api_settings.DEFAULT_PAGINATION_CLASS
+    if pagination_class is None:
+        return Response(serialize(queryset), status=status.HTTP_200_OK)
+
+    paginator = pagination_class()
+    page = paginator.paginate_queryset(queryset, request)
+    return paginator.get_paginated_response(serialize(page))
+
+
+def bulk_create_response(data, serializer_class):
+    """
+    Validate a list of objects in one pass and create them in one
+    transaction, responding with the new ids in the order of the input
+    """
+    serializer = serializer_class(data=data, many=True)
+    if serializer.is_valid():
+        instances = serializer.save()
+        return Response(
+            [instance.id for instance in instances],
+            status=status.HTTP_201_CREATED
+        )
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+def assign_partners(auto, partner_ids):
+    """
+    Connect the auto to a list of partners:
+     - one query for the existing partners
+     - one query for the already existing connections
+     - one UPDATE restoring the soft deleted connections
+     - one batched INSERT for the missing connections
+    Returns the result for every distinct id in the order of the input.
+    """
+    partner_ids = list(dict.fromkeys(partner_ids))
+    existing_partners = set(
+        Partner.alive.filter(pk__in=partner_ids).values_list('id', flat=True)
+    )
+    connected = dict(
+        AutoPartnerConnection.objects.filter(
+            auto=auto,
+            partner_id__in=existing_partners
+        ).values_list('partner_id', 'deleted_at')
+    )
+
+    now = int(time.time())
+    results = []
+    restored = []
+    connections = []
+    for partner_id in partner_ids:
+        if partner_id not in existing_partners:
+            result = 'not_found'
+        elif partner_id in connected and connected[partner_id] is None:
+            result = 'exists'
+        elif partner_id in connected:
+            result = 'restored'
+            restored.append(partner_id)
+        else:
+            result = 'created'
+            connections.append(AutoPartnerConnection(
+                auto=auto,
+                partner_id=partner_id,
+                created_at=now,
+                modify_at=now
+            ))
+        results.append({'partner': partner_id, 'status': result})
+
+    with transaction.atomic():
+        if restored:
+            AutoPartnerConnection.objects.filter(
+                auto=auto,
+                partner_id__in=restored
+            ).restore()
+        AutoPartnerConnection.objects.bulk_create(
+            connections,
+            ignore_conflicts=True
+        )
+    return results
+
+
+def bulk_soft_delete_response(request, model, filter_fields, action):
+    """
+    Soft delete or restore the selected rows with one UPDATE
+    """
+    data = JSONParser().parse(request)
+    serializer = serializers.BulkSoftDeleteSerializer(
+        data=data,
+        context={
+            'filter_fields': filter_fields
+        }
+    )
+    if serializer.is_valid():
+        queryset = serializer.filter_queryset(model.objects.all())
+        if action == 'delete':
+            count = queryset.soft_delete()
+        else:
+            count = queryset.restore()
+        return Response({'count': count}, status=status.HTTP_200_OK)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+def changes_response(request, queryset, serializer_class):
+    """
+    Rows modified since ?since=<unix timestamp>, soft deleted ones as
+    tombstones. Soft delete bumps modify_at too, so one indexed range on
+    modify_at finds both. The watermark is settings.CHANGES_WATERMARK_LAG
+    seconds in the past: rows of still open transactions are left for the
+    next sync instead of being missed.
+    """
+    since = request.query_params.get('since')
+    try:
+        since = int(since)
+    except (TypeError, ValueError):
+        raise ValidationError({'since': ['A valid integer is required.']})
+
+    watermark = int(time.time()) - settings.CHANGES_WATERMARK_LAG
+    rows = list(queryset.filter(
+        modify_at__gt=since,
+        modify_at__lte=watermark
+    ).order_by('modify_at', 'id'))
+
+    serializer = serializer_class(
+        [row for row in rows if row.deleted_at is None],
+        many=True,
+        context={
+            'depth': 0
+        }
+    )
+    return Response({
+        'since': since,
+        'watermark': watermark,
+        'changed': serializer.data,
+        'deleted': [
+            {'id': row.id, 'deleted_at': row.deleted_at}
+            for row in rows if row.deleted_at is not None
+        ]
+    }, status=status.HTTP_200_OK)
+
+
 @csrf_exempt
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@conditional_response
+@cache_response(Partner, Auto, AutoPartnerConnection)
 def partner_list_create(request):
     # LIST
     if request.method == 'GET':
-        partnerek = Partner.objects.filter(deleted_at=None)
-        serializer = serializers.PartnerSerializer(
-            partnerek,
-            many=True,
-            context={
-                'query': request.query_params.get('query', 'flat')
-            }
+        context = get_serializer_context(request)
+        return list_response(
+            request,
+            Partner.alive.all(),
+            serializers.PartnerSerializer,
+            context
         )
-        return Response(serializer.data, status=status.HTTP_200_OK)
     # CREATE
     elif request.method == 'POST':
         data = JSONParser().parse(request)
+        if isinstance(data, list):
+            return bulk_create_response(data, serializers.PartnerSerializer)
         serializer = serializers.PartnerSerializer(data=data)
         if serializer.is_valid():
             serializer.save()
@@ -44,45 +267,64 @@ def partner_list_create(request):
 @csrf_exempt
 @api_view(['GET', 'DELETE'])
 @permission_classes([IsAuthenticated])
+@conditional_response
+@cache_response(Partner, Auto, AutoPartnerConnection)
 def partner_detail_delete(request, pk):
+    # DELETE
+    if request.method == 'DELETE':
+        if Partner.alive.filter(pk=pk).soft_delete():
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(status=status.HTTP_404_NOT_FOUND)
+
+    partnerek = Partner.alive.all()
+    if request.method == 'GET':
+        context = get_serializer_context(request)
+        partnerek = serializers.PartnerSerializer.setup_queryset(partnerek, context)
     try:
-        partner = Partner.objects.filter(deleted_at=None).get(pk=pk)
+        partner = partnerek.get(pk=pk)
     except Partner.DoesNotExist:
         return Response(status=status.HTTP_404_NOT_FOUND)
     # DETAIL
     if request.method == 'GET':
         serializer = serializers.PartnerSerializer(
             partner,
-            context={
-                'query': request.query_params.get('query', 'flat')
-            }
+            context=context
         )
         return Response(serializer.data, status=status.HTTP_200_OK)
-    # DELETE
-    elif request.method == 'DELETE':
-        partner.deleted_at = int(time.time())
-        partner.save()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def partner_bulk_delete_restore(request, action):
+    return bulk_soft_delete_response(
+        request,
+        Partner,
+        ('name', 'city', 'address', 'company_name'),
+        action
+    )
 
 
 @csrf_exempt
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@conditional_response
+@cache_response(Partner, Auto, AutoPartnerConnection)
 def auto_list_create(request):
     # LIST
     if request.method == 'GET':
-        autok = Auto.objects.filter(deleted_at=None)
-        serializer = serializers.AutoSerializer(
-            autok,
-            many=True,
-            context={
-                'query': request.query_params.get('query', 'flat')
-            }
+        context = get_serializer_context(request)
+        return list_response(
+            request,
+            filter_delegations(request, Auto.alive.all()),
+            serializers.AutoSerializer,
+            context
         )
-        return Response(serializer.data, status=status.HTTP_200_OK)
     # CREATE
     elif request.method == 'POST':
         data = JSONParser().parse(request)
+        if isinstance(data, list):
+            return bulk_create_response(data, serializers.AutoSerializer)
         serializer = serializers.AutoSerializer(data=data)
         if serializer.is_valid():
             serializer.save()
@@ -93,39 +335,135 @@ def auto_list_create(request):
 @csrf_exempt
 @api_view(['GET', 'DELETE', 'POST'])
 @permission_classes([IsAuthenticated])
+@conditional_response
+@cache_response(Partner, Auto, AutoPartnerConnection)
 def auto_detail_delete(request, pk):
+    # DELETE
+    if request.method == 'DELETE':
+        if Auto.alive.filter(pk=pk).soft_delete():
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(status=status.HTTP_404_NOT_FOUND)
+
+    autok = Auto.alive.all()
+    if request.method == 'GET':
+        context = get_serializer_context(request)
+        autok = serializers.AutoSerializer.setup_queryset(autok, context)
     try:
-        auto = Auto.objects.filter(deleted_at=None).get(pk=pk)
+        auto = autok.get(pk=pk)
     except Auto.DoesNotExist:
         return Response(status=status.HTTP_404_NOT_FOUND)
     # DETAIL
     if request.method == 'GET':
         serializer = serializers.AutoSerializer(
             auto,
-            context={
-                'query': request.query_params.get('query', 'flat')
-            }
+            context=context
         )
         return Response(serializer.data, status=status.HTTP_200_OK)
-    # DELETE
-    elif request.method == 'DELETE':
-        auto.deleted_at = int(time.time())
-        auto.save()
-        return Response(status=status.HTTP_204_NO_CONTENT)
     # CREATE
     elif request.method == 'POST':
         data = JSONParser().parse(request)
-        if data.get('partner'):
-            data['auto'] = auto.id
-            serializer = serializers.AutoPartnerConnectionSerializer(data=data)
+        if isinstance(data.get('partner'), list):
+            serializer = serializers.PartnerAssignmentSerializer(data=data)
             if serializer.is_valid():
-                serializer.save()
-                return Response(serializer.data, status=status.HTTP_201_CREATED)
+                results = assign_partners(
+                    auto,
+                    serializer.validated_data['partner']
+                )
+                statuses = {result['status'] for result in results}
+                if statuses & {'created', 'restored'}:
+                    return Response(results, status=status.HTTP_201_CREATED)
+                if statuses == {'not_found'}:
+                    return Response(results, status=status.HTTP_400_BAD_REQUEST)
+                return Response(results, status=status.HTTP_200_OK)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        elif data.get('partner'):
+            # same path as the list, so a cascaded connection is restored
+            serializer = serializers.PartnerAssignmentSerializer(data={'partner': [data['partner']]})
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            result, = assign_partners(auto, serializer.validated_data['partner'])
+            if result['status'] == 'not_found':
+                return Response(
+                    {'partner': ['Invalid pk "%s" - object does not exist.' % result['partner']]},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if result['status'] == 'exists':
+                return Response(
+                    {'non_field_errors': ['The fields auto, partner must make a unique set.']},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            connection = AutoPartnerConnection.alive.get(auto=auto, partner_id=result['partner'])
+            return Response(
+                serializers.AutoPartnerConnectionSerializer(connection).data,
+                status=status.HTTP_201_CREATED
+            )
         else:
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
 
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def auto_bulk_delete_restore(request, action):
+    return bulk_soft_delete_response(
+        request,
+        Auto,
+        ('driver', 'owner', 'type'),
+        action
+    )
+
+
+@csrf_exempt
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def auto_conflicts(request):
+    """
+    Streamed report of the overlapping delegations of the same driver,
+    optionally for one ?driver= and inside an ?active_at= / ?overlaps= window
+    """
+    autok = filter_delegations(request, Auto.alive.all())
+    driver = request.query_params.get('driver')
+    if driver is not None:
+        autok = autok.filter(driver=driver)
+    return streaming_rows_response(
+        find_conflicts(iterate_intervals(autok, settings.STREAM_CHUNK_SIZE)),
+        settings.STREAM_CHUNK_SIZE
+    )
+
+
+@csrf_exempt
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def partner_changes(request):
+    return changes_response(
+        request,
+        serializers.PartnerSerializer.setup_eager_loading(Partner.objects.all()),
+        serializers.PartnerSerializer
+    )
+
+
+@csrf_exempt
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def auto_changes(request):
+    return changes_response(
+        request,
+        serializers.AutoSerializer.setup_eager_loading(Auto.objects.all()),
+        serializers.AutoSerializer
+    )
+
+
+@csrf_exempt
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def autopartnerkapcsolat_changes(request):
+    return changes_response(
+        request,
+        AutoPartnerConnection.objects.all(),
+        serializers.AutoPartnerConnectionSerializer
+    )
+
+
 # @csrf_exempt
 # @api_view(['GET'])
 # @permission_classes([IsAuthenticated])
@@ -0,0 +1,93 @@
+"""
+Gunicorn configuration of the production server, run from the repository
+root with:
+
+    gunicorn -c src/gunicorn.conf.py roadrecord.wsgi
+
+Every setting can be overridden from the environment (GUNICORN_*).
+
+ - workers are forked after the application is loaded (preload), so the
+   imports and the warm-up are paid once and the memory is shared
+ - with GUNICORN_THREADS > 1 every worker serves requests from a thread
+   pool (gthread worker), size DB_POOL_MAX_SIZE / max_connections of
+   postgres accordingly (see DATABASES in roadrecord/settings.py)
+ - workers are recycled after max_requests (+ jitter, so they do not
+   restart together) to bound memory growth; the metrics of the exited
+   workers are summed in METRICS_DIR/retired.json
+ - graceful reload: `kill -HUP <master pid>` starts new workers and lets
+   the old ones finish their requests for up to graceful_timeout seconds;
+   with preload the code is not re-imported by HUP, deploy new code with
+   `kill -USR2 <master pid>` (new master) and then `kill -QUIT` the old one
+"""
+import multiprocessing
+import os
+import time
+
+chdir = os.path.dirname(os.path.abspath(__file__))
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+worker_class = 'gthread' if threads > 1 else 'sync'
+# read by the settings: process local caches are not safe with several workers
+os.environ['SERVER_WORKERS'] = str(workers)
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 500))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+accesslog = os.environ.get('GUNICORN_ACCESSLOG') or None
+errorlog = '-'
+
+
+def on_starting(server):
+    # metric dumps of the workers of a previous master are stale
+    metrics_dir = os.environ.get('METRICS_DIR')
+    if metrics_dir:
+        os.makedirs(metrics_dir, exist_ok=True)
+        for name in os.listdir(metrics_dir):
+            os.remove(os.path.join(metrics_dir, name))
+
+
+def when_ready(server):
+    # runs in the master after the preload, before the workers are forked:
+    # connections opened while loading the application must not be
+    # inherited and shared by the workers
+    from django.db import connections
+    connections.close_all()
+
+
+def post_worker_init(worker):
+    # the worker accepts requests only after this hook returns
+    if os.environ.get('WARMUP', '1') == '1':
+        from roadrecord.warmup import warm_up_connections
+        start = time.perf_counter()
+        try:
+            # gthread workers serve from other threads than this one
+            warm_up_connections(keep=worker.cfg.threads == 1)
+        except Exception:
+            # the worker still starts, the requests open the connections
+            worker.log.exception('Opening the worker connections failed')
+            return
+        worker.log.info('Worker connections opened in %.1f ms', (time.perf_counter() - start) * 1000)
+
+
+def worker_exit(server, worker):
+    # the requests since the last periodic dump
+    if os.environ.get('METRICS_DIR'):
+        from roadrecord.metrics import registry
+        registry.flush()
+
+
+def child_exit(server, worker):
+    # runs in the master: keep the totals of the worker, drop its file
+    metrics_dir = os.environ.get('METRICS_DIR')
+    if metrics_dir:
+        from roadrecord.metrics import retire_worker
+        try:
+            retire_worker(metrics_dir, worker.pid)
+        except (OSError, ValueError):
+            server.log.exception('Could not retire the metrics of worker %d', worker.pid)
@@ -0,0 +1,73 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+
+class QueueStreamHandler(QueueHandler):
+    """
+    Stream handler writing from a background thread:
+     - the request thread only puts the record on a bounded queue
+     - formatting and the stream I/O happen in the QueueListener thread
+     - records are dropped instead of blocking when the queue is full,
+       their count is written out when the handler stops
+    The listener is (re)started lazily in every process, so forked workers
+    get their own writer thread.
+    """
+
+    def __init__(self, stream=None, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.target = logging.StreamHandler(stream)
+        self.listener = None
+        self.pid = None
+        # one listener per process even when threads emit the first records together
+        self.start_lock = threading.Lock()
+        self.dropped = 0
+
+    def setFormatter(self, fmt):
+        # formatting is done by the writer thread
+        self.target.setFormatter(fmt)
+
+    def start(self):
+        self.pid = os.getpid()
+        self.listener = QueueListener(self.queue, self.target, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        if self.listener is not None and self.pid == os.getpid():
+            self.listener.stop()
+            if self.dropped:
+                # the writer thread is gone, nothing else writes the stream
+                self.target.handle(logging.makeLogRecord({
+                    'name': __name__,
+                    'levelno': logging.WARNING,
+                    'levelname': 'WARNING',
+                    'msg': 'Log queue full, %d records dropped',
+                    'args': (self.dropped,),
+                }))
+                self.dropped = 0
+        self.listener = None
+
+    def prepare(self, record):
+        # keep the record as is, the message is built by the writer thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        if self.pid != os.getpid():
+            with self.start_lock:
+                if self.pid != os.getpid():
+                    self.start()
+        super().emit(record)
+
+    def close(self):
+        self.stop()
+        super().close()
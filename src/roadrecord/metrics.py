@@ -0,0 +1,195 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the request latency histogram, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Totals of the exited workers in METRICS_DIR
+RETIRED_FILE = 'retired.json'
+
+# Per-request counters summed for each (view, method)
+COUNTERS = (
+    ('db_queries', 'roadrecord_request_db_queries_total', 'Database queries run by the requests'),
+    ('db_seconds', 'roadrecord_request_db_seconds_total', 'Time spent in database queries'),
+    ('response_bytes', 'roadrecord_response_bytes_total', 'Size of the non streaming response bodies'),
+)
+
+
+class MetricsRegistry:
+    """
+    Request metrics of this process, keyed by (url name, method):
+     - latency histogram: one counter per bucket, plus the sum
+     - db query count, db time and response size counters
+    With settings.METRICS_DIR every process also dumps its state to
+    <METRICS_DIR>/<pid>.json and the export merges all the files, so
+    every worker of the server is covered whichever one gets the scrape.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # one dump at a time: the threads of a worker share the file names
+        self.flush_lock = threading.Lock()
+        self.samples = {}
+        self.flushed_at = 0
+
+    def observe(self, view, method, seconds, db_queries, db_seconds, response_bytes):
+        with self.lock:
+            sample = self.samples.get((view, method))
+            if sample is None:
+                sample = self.samples[(view, method)] = {
+                    'buckets': [0] * (len(LATENCY_BUCKETS) + 1),
+                    'count': 0,
+                    'seconds': 0,
+                    'db_queries': 0,
+                    'db_seconds': 0,
+                    'response_bytes': 0,
+                }
+            sample['buckets'][bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            sample['count'] += 1
+            sample['seconds'] += seconds
+            sample['db_queries'] += db_queries
+            sample['db_seconds'] += db_seconds
+            sample['response_bytes'] += response_bytes
+        if settings.METRICS_DIR and time.monotonic() - self.flushed_at > settings.METRICS_FLUSH_INTERVAL:
+            self.flush(settings.METRICS_FLUSH_INTERVAL)
+
+    def snapshot(self):
+        with self.lock:
+            return [
+                {'view': view, 'method': method, **dict(sample, buckets=list(sample['buckets']))}
+                for (view, method), sample in self.samples.items()
+            ]
+
+    def flush(self, interval=None):
+        """
+        Atomically replace the dump of this process in settings.METRICS_DIR,
+        unless another thread did it in the last `interval` seconds. A
+        failed write is logged, it never fails the request.
+        """
+        with self.flush_lock:
+            if interval is not None and time.monotonic() - self.flushed_at <= interval:
+                return
+            self.flushed_at = time.monotonic()
+            path = os.path.join(settings.METRICS_DIR, '%d.json' % os.getpid())
+            try:
+                with open(path + '.tmp', 'w') as f:
+                    json.dump(self.snapshot(), f)
+                os.replace(path + '.tmp', path)
+            except OSError:
+                logger.warning('Could not write the metrics to %s', path, exc_info=True)
+
+    def collect(self):
+        """
+        Samples of every process, summed per (view, method)
+        """
+        if not settings.METRICS_DIR:
+            return self.snapshot()
+
+        self.flush()
+        merged = {}
+        for name in os.listdir(settings.METRICS_DIR):
+            if not name.endswith('.json'):
+                continue
+            try:
+                merge_samples(merged, read_samples(os.path.join(settings.METRICS_DIR, name)))
+            except (OSError, ValueError):
+                continue
+        return list(merged.values())
+
+    def reset(self):
+        with self.lock:
+            self.samples = {}
+
+
+def read_samples(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def merge_samples(merged, samples):
+    """
+    Add `samples` to the ones in `merged`, keyed by (view, method)
+    """
+    for sample in samples:
+        key = (sample['view'], sample['method'])
+        if key not in merged:
+            merged[key] = sample
+            continue
+        total = merged[key]
+        total['buckets'] = [a + b for a, b in zip(total['buckets'], sample['buckets'])]
+        for field in ('count', 'seconds', 'db_queries', 'db_seconds', 'response_bytes'):
+            total[field] += sample[field]
+
+
+def retire_worker(metrics_dir, pid):
+    """
+    Move the dump of an exited worker into <metrics_dir>/retired.json, so
+    its totals are kept, the directory does not grow with every recycled
+    worker and a new worker reusing the pid starts from zero
+    """
+    path = os.path.join(metrics_dir, '%d.json' % pid)
+    if not os.path.exists(path):
+        return
+    retired = os.path.join(metrics_dir, RETIRED_FILE)
+    merged = {}
+    if os.path.exists(retired):
+        merge_samples(merged, read_samples(retired))
+    merge_samples(merged, read_samples(path))
+    with open(retired + '.tmp', 'w') as f:
+        json.dump(list(merged.values()), f)
+    os.replace(retired + '.tmp', retired)
+    os.remove(path)
+
+
+registry = MetricsRegistry()
+
+
+def format_labels(sample, **extra):
+    labels = dict({'view': sample['view'], 'method': sample['method']}, **extra)
+    return ','.join('%s="%s"' % (key, value) for key, value in labels.items())
+
+
+def render_metrics(samples):
+    """
+    Samples in the Prometheus text exposition format
+    """
+    samples = sorted(samples, key=lambda sample: (sample['view'], sample['method']))
+    lines = [
+        '# HELP roadrecord_request_duration_seconds Request latency',
+        '# TYPE roadrecord_request_duration_seconds histogram',
+    ]
+    for sample in samples:
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), sample['buckets']):
+            cumulative += count
+            lines.append('roadrecord_request_duration_seconds_bucket{%s} %d' % (
+                format_labels(sample, le=bound), cumulative
+            ))
+        lines.append('roadrecord_request_duration_seconds_sum{%s} %r' % (format_labels(sample), sample['seconds']))
+        lines.append('roadrecord_request_duration_seconds_count{%s} %d' % (format_labels(sample), sample['count']))
+
+    for field, name, description in COUNTERS:
+        lines.append('# HELP %s %s' % (name, description))
+        lines.append('# TYPE %s counter' % name)
+        for sample in samples:
+            lines.append('%s{%s} %r' % (name, format_labels(sample), sample[field]))
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """
+    Scrape endpoint of the request metrics
+    """
+    return HttpResponse(
+        render_metrics(registry.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -1,8 +1,62 @@
 import logging
+import random
+import re
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from .metrics import registry
 
 logger = logging.getLogger(__name__)
 logger.info('Logger Started')
 
+query_logger = logging.getLogger('roadrecord.queries')
+
+# Placeholder lists of IN (...) collapse to one, batches of any size share a shape
+PLACEHOLDER_LIST = re.compile(r'%s(?:\s*,\s*%s)+')
+
+
+class RequestLogMessage:
+    """
+    Log message of a request, only turned into a string by the log writer
+    """
+
+    __slots__ = ('endpoint', 'method', 'post', 'get')
+
+    def __init__(self, request):
+        self.endpoint = request.get_full_path()
+        self.method = str(getattr(request, 'method', '')).upper()
+        self.post = getattr(request, 'POST', '')
+        self.get = getattr(request, 'GET', '')
+
+    def __str__(self):
+        body = "POST: " + str(self.post) + "GET: " + str(self.get)
+        if len(body) > settings.LOG_BODY_MAX_LENGTH:
+            body = body[:settings.LOG_BODY_MAX_LENGTH] + '...'
+        return str({
+            "endpoint": self.endpoint,
+            "method": self.method,
+            "request": body
+        })
+
+
+def get_sample_rate(path):
+    """
+    Sample rate of the longest matching prefix in settings.LOG_SAMPLE_RATES
+    """
+    prefixes = [prefix for prefix in settings.LOG_SAMPLE_RATES if path.startswith(prefix)]
+    if not prefixes:
+        return 1
+    return settings.LOG_SAMPLE_RATES[max(prefixes, key=len)]
+
+
+def get_view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.url_name if match and match.url_name else 'unmatched'
+
 
 class LoggingMiddleware:
     """
@@ -21,10 +75,112 @@ class LoggingMiddleware:
 
         response = self.get_response(request)
 
-        logger.info({
-            "endpoint": request.get_full_path(),
-            "method": str(getattr(request, 'method', '')).upper(),
-            "request": "POST: " + str(getattr(request, 'POST', '')) + "GET: " + str(getattr(request, 'GET', ''))
-        })
+        if not logger.isEnabledFor(logging.INFO):
+            return response
+        rate = get_sample_rate(request.path)
+        if rate < 1 and random.random() >= rate:
+            return response
+
+        logger.info(RequestLogMessage(request))
+
+        return response
+
+
+class QueryCounter:
+    """
+    Database execute wrapper counting the queries and their time
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    """
+    Metrics middleware to record per url name:
+     - latency
+     - database query count and time
+     - response size
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        seconds = time.perf_counter() - start
+
+        registry.observe(
+            view=get_view_name(request),
+            method=request.method,
+            seconds=seconds,
+            db_queries=counter.count,
+            db_seconds=counter.seconds,
+            # streamed bodies are not buffered, their size is unknown here
+            response_bytes=0 if response.streaming else len(response.content)
+        )
+
+        return response
+
+
+class QueryInspector:
+    """
+    Database execute wrapper logging the slow queries and counting the
+    queries per SQL shape
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            seconds = time.perf_counter() - start
+            self.shapes[PLACEHOLDER_LIST.sub('%s', sql)] += 1
+            if seconds * 1000 >= settings.QUERY_SLOW_THRESHOLD_MS:
+                query_logger.warning('Slow query in %s (%.1f ms): %s',
+                                     get_view_name(self.request), seconds * 1000, sql)
+
+    def repeated(self):
+        return [(sql, count) for sql, count in self.shapes.most_common()
+                if count >= settings.QUERY_REPEAT_THRESHOLD]
+
+
+class QueryInspectionMiddleware:
+    """
+    Opt-in (settings.QUERY_INSPECTION) middleware to log:
+     - queries slower than settings.QUERY_SLOW_THRESHOLD_MS
+     - SQL shapes run at least settings.QUERY_REPEAT_THRESHOLD times in one
+       request, the per row relationship queries of an N+1
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_INSPECTION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        inspector = QueryInspector(request)
+        with connection.execute_wrapper(inspector):
+            response = self.get_response(request)
+
+        for sql, count in inspector.repeated():
+            query_logger.warning('Repeated query in %s (%d times): %s',
+                                 get_view_name(request), count, sql)
 
         return response
@@ -46,6 +46,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'roadrecord.middleware.MetricsMiddleware',
+    'roadrecord.middleware.QueryInspectionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -80,14 +82,38 @@ WSGI_APPLICATION = 'roadrecord.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Connections:
+#  - persistent (default): every worker thread keeps its own connection for
+#    DB_CONN_MAX_AGE seconds, so a server holds workers * threads
+#    connections; keep that below the max_connections of postgres
+#  - pooled (DB_POOL_MAX_SIZE > 0): the threads of a worker process share
+#    a pool of at most DB_POOL_MAX_SIZE connections, taken for the length of
+#    a request; a server holds up to workers * DB_POOL_MAX_SIZE connections.
+#    A pool larger than the threads of a worker is never used, a smaller
+#    one makes requests wait (at most DB_POOL_TIMEOUT seconds) for a
+#    connection, which is useful when threads mostly do non database work.
+#    Sync (one thread) workers get nothing from a pool, use persistent ones.
+# DB_CONN_HEALTH_CHECKS pings a reused connection before its first query of
+# a request, so a connection dropped by the server or a proxy is replaced
+# instead of failing the request.
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 0))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'postgres',
-        'USER': 'postgres',
-        'PASSWORD': 'postgres',
-        'HOST': 'db',
-        'PORT': 5432,
+        'ENGINE': os.environ.get('DB_ENGINE', 'utils.postgresql'),
+        'NAME': os.environ.get('DB_NAME', 'postgres'),
+        'USER': os.environ.get('DB_USER', 'postgres'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', 'postgres'),
+        'HOST': os.environ.get('DB_HOST', 'db'),
+        'PORT': int(os.environ.get('DB_PORT', 5432)),
+        # pooled connections go back to the pool at the end of the request
+        'CONN_MAX_AGE': 0 if DB_POOL_MAX_SIZE else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1',
+        'POOL': {
+            'MIN_SIZE': int(os.environ.get('DB_POOL_MIN_SIZE', 1)),
+            'MAX_SIZE': DB_POOL_MAX_SIZE,
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        } if DB_POOL_MAX_SIZE else None,
     }
 }
 # DATABASES = {
@@ -98,6 +124,55 @@ DATABASES = {
 # }
 
 
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+# 'default' holds the cached responses, local memory (LRU, per process) is
+# fine for them: their keys contain the model version counters.
+# 'versions' holds those counters and must be shared by every process
+# serving requests (every gunicorn worker, every node), otherwise a write
+# on one worker does not invalidate the responses of the others. Point
+# VERSION_CACHE_BACKEND/VERSION_CACHE_LOCATION (by default the CACHE_*
+# ones) to memcached for more than one worker, see docker-compose.yml.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'roadrecord'),
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', 300)),
+    },
+}
+CACHES['versions'] = {
+    'BACKEND': os.environ.get('VERSION_CACHE_BACKEND', CACHES['default']['BACKEND']),
+    'LOCATION': os.environ.get(
+        'VERSION_CACHE_LOCATION',
+        os.environ.get('CACHE_LOCATION', 'roadrecord-versions')
+    ),
+    'TIMEOUT': None,
+}
+if CACHES['default']['BACKEND'].endswith('LocMemCache'):
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 1000))
+    }
+
+# Processes serving requests on this node, set by gunicorn.conf.py
+SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', 1))
+
+# Version counters every process sees the same way
+MODEL_VERSIONS_SHARED = (
+    not CACHES['versions']['BACKEND'].endswith('LocMemCache') or SERVER_WORKERS == 1
+)
+
+# Cache of the GET responses, invalidated by per-model version counters,
+# turned off while the counters are local to one of several workers
+RESPONSE_CACHE_ALIAS = 'default'
+VERSION_CACHE_ALIAS = 'versions'
+RESPONSE_CACHE_ENABLED = MODEL_VERSIONS_SHARED and os.environ.get('RESPONSE_CACHE', '1') == '1'
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -138,28 +213,89 @@ STATIC_URL = '/static/'
 
 
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'apps.pagination.IdCursorPagination',
     'PAGE_SIZE': 10,
     'TEST_REQUEST_DEFAULT_FORMAT': 'json',
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        # no query without a session cookie
+        'rest_framework.authentication.SessionAuthentication',
+        # token of the login response, user cached in process
+        'utils.authentication.CachedTokenAuthentication',
+    ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        # FastJSONRenderer: orjson, JSONRenderer when it is not installed
+        os.environ.get('JSON_RENDERER', 'utils.renderers.FastJSONRenderer'),
         # 'rest_framework.renderers.BrowsableAPIRenderer'
     ]
 }
 
+# The login answers a token only: a session cookie would be sent back by
+# the clients keeping cookies and checked before the (cached) token, at the
+# price of the django_session and auth_user queries on every request
+REST_SESSION_LOGIN = False
+
+# Token -> user entries kept per process by CachedTokenAuthentication, and
+# seconds a deleted token may still be accepted by another worker
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 10000))
+TOKEN_CACHE_TTL = float(os.environ.get('TOKEN_CACHE_TTL', 60))
+
+# Hard cap for the ?depth= expansion of the Auto <-> Partner relationship
+NESTED_MAX_DEPTH = 3
+
+# Rows serialized per query by the ?stream=1 list export
+STREAM_CHUNK_SIZE = 500
+
+# Seconds the watermark of the /changes/ endpoints stays behind the clock.
+# modify_at is set when the row is written, not when it is committed, so a
+# transaction running longer than this can still commit rows below an
+# already returned watermark: keep it above the longest write transaction.
+CHANGES_WATERMARK_LAG = int(os.environ.get('CHANGES_WATERMARK_LAG', 60))
+
+# Directory shared by the server workers for the /metrics/ aggregation,
+# empty to export the metrics of the scraped process only
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+
+# Seconds between two dumps of the metrics of a worker to METRICS_DIR
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+
+# Slow and repeated (N+1) query logging, meant for staging
+QUERY_INSPECTION = os.environ.get('QUERY_INSPECTION', '') == '1'
+QUERY_SLOW_THRESHOLD_MS = float(os.environ.get('QUERY_SLOW_THRESHOLD_MS', 100))
+QUERY_REPEAT_THRESHOLD = int(os.environ.get('QUERY_REPEAT_THRESHOLD', 5))
+
+# Request body characters kept in a LoggingMiddleware record
+LOG_BODY_MAX_LENGTH = int(os.environ.get('LOG_BODY_MAX_LENGTH', 1000))
+
+# Path prefix -> share of requests logged by LoggingMiddleware,
+# the longest matching prefix wins, unmatched paths are always logged
+LOG_SAMPLE_RATES = {
+    '/auto/': float(os.environ.get('LOG_SAMPLE_RATE_AUTO', 1)),
+    '/partner/': float(os.environ.get('LOG_SAMPLE_RATE_PARTNER', 1)),
+}
+
 # LOG_PATH = os.path.join(BASE_DIR, "log/")
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'handlers': {
         'file': {
-            'class': 'logging.StreamHandler',
+            # StreamHandler behind a queue, written by a background thread
+            'class': 'roadrecord.log.QueueStreamHandler',
+            'maxsize': int(os.environ.get('LOG_QUEUE_SIZE', 10000)),
         }
     },
     'loggers': {
         'roadrecord.middleware': {
             'handlers': ['file'],
             'level': 'INFO'
+        },
+        'roadrecord.queries': {
+            'handlers': ['file'],
+            'level': 'WARNING'
+        },
+        'roadrecord.warmup': {
+            'handlers': ['file'],
+            'level': 'INFO'
         }
     }
 }
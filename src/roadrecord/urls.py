@@ -3,18 +3,29 @@ from django.urls import path, include
 from rest_auth.views import LoginView, LogoutView
 
 from apps.views import *
+from roadrecord.metrics import metrics_view
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('login/', LoginView.as_view(), name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
+    path('metrics/', metrics_view, name='metrics'),
 
     path("partner/", partner_list_create, name='partner-list'),
     path("partner/<int:pk>/", partner_detail_delete, name='partner-detail'),
+    path("partner/bulk-delete/", partner_bulk_delete_restore, {'action': 'delete'}, name='partner-bulk-delete'),
+    path("partner/bulk-restore/", partner_bulk_delete_restore, {'action': 'restore'}, name='partner-bulk-restore'),
+    path("partner/changes/", partner_changes, name='partner-changes'),
 
     path("auto/", auto_list_create, name='auto-list'),
     path("auto/<int:pk>/", auto_detail_delete, name='auto-detail'),
+    path("auto/bulk-delete/", auto_bulk_delete_restore, {'action': 'delete'}, name='auto-bulk-delete'),
+    path("auto/bulk-restore/", auto_bulk_delete_restore, {'action': 'restore'}, name='auto-bulk-restore'),
+    path("auto/changes/", auto_changes, name='auto-changes'),
+    path("auto/conflicts/", auto_conflicts, name='auto-conflicts'),
+
+    path("autopartner/changes/", autopartnerkapcsolat_changes, name='kapcsolat-changes'),
 
     # path("autopartner/", autopartnerkapcsolat_list, name='kapcsolat-detail'),
     # path("autopartner/<int:pk>/", autopartnerkapcsolat_detail_delete, name='kapcsolat-detail'),
@@ -0,0 +1,64 @@
+import logging
+import time
+
+from django.db import connections
+from django.urls import get_resolver, reverse
+from rest_framework.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up_application():
+    """
+    Pay the lazy per process costs before the first request:
+     - url resolver and the view modules
+     - DRF settings classes (renderers, parsers, authentication, pagination)
+     - serializer field maps and the values_list converters
+     - response cache version counters
+    """
+    from apps.models import Partner, Auto, AutoPartnerConnection
+    from apps.readers import get_converters
+    from apps.serializers import AutoSerializer, PartnerSerializer
+    from utils.cache import get_model_versions
+
+    resolver = get_resolver()
+    for name in ('partner-list', 'auto-list'):
+        resolver.resolve(reverse(name))
+
+    for setting in ('DEFAULT_RENDERER_CLASSES', 'DEFAULT_PARSER_CLASSES',
+                    'DEFAULT_AUTHENTICATION_CLASSES', 'DEFAULT_PERMISSION_CLASSES'):
+        getattr(api_settings, setting)
+    api_settings.DEFAULT_PAGINATION_CLASS()
+    api_settings.DEFAULT_RENDERER_CLASSES[0]().render({'id': 1})
+
+    for serializer_class in (AutoSerializer, PartnerSerializer):
+        serializer_class().fields
+        get_converters(serializer_class)
+
+    get_model_versions((Partner, Auto, AutoPartnerConnection))
+
+
+def warm_up_connections(keep=True):
+    """
+    Open the database connection of every alias of this thread, keep it
+    only if this thread serves the requests; a pooled connection always
+    goes back to the (now filled) pool
+    """
+    for connection in connections.all():
+        connection.ensure_connection()
+        if not keep or connection.settings_dict.get('POOL'):
+            connection.close()
+
+
+def warm_up():
+    """
+    Run every warm-up step; a failing one (e.g. the database is not up yet)
+    is logged and skipped, the server starts and pays the cost lazily
+    """
+    start = time.perf_counter()
+    for step in (warm_up_application, warm_up_connections):
+        try:
+            step()
+        except Exception:
+            logger.exception('Warm-up step %s failed, skipped', step.__name__)
+    logger.info('Warm-up finished in %.1f ms', (time.perf_counter() - start) * 1000)
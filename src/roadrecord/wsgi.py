@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'roadrecord.settings')
 
 application = get_wsgi_application()
+
+if os.environ.get('WARMUP', '1') == '1':
+    from roadrecord.warmup import warm_up
+
+    # gunicorn with preload runs this in the master, the connections are
+    # opened again by every worker (post_worker_init of gunicorn.conf.py)
+    warm_up()
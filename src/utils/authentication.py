@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+class TokenCache:
+    """
+    Bounded in-process token key -> (user id, user state, token state)
+    cache, see `instance_state`:
+     - entries expire `ttl` seconds after they were stored
+     - the least recently used entry is evicted above `maxsize` entries
+    Invalidation only reaches the process it runs in, the ttl bounds how
+    long another worker may still accept a deleted token.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def delete_user(self, user_id):
+        with self.lock:
+            for key in [key for key, ((pk, _, _), _) in self.entries.items() if pk == user_id]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL)
+
+
+def instance_state(instance):
+    """
+    Database alias and column values of a model instance: plain immutable
+    values, unlike the instance whose _state (related object caches
+    included) a copy would still share
+    """
+    return instance._state.db, tuple(getattr(instance, field.attname) for field in instance._meta.concrete_fields)
+
+
+def from_state(model, state):
+    """
+    New instance of `model` from `instance_state`, as if loaded by a query
+    """
+    db, values = state
+    return model.from_db(db, [field.attname for field in model._meta.concrete_fields], values)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication looking the token up in the database only on a
+    cache miss
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, (user.pk, instance_state(user), instance_state(token)))
+            return user, token
+        # every request (and thread) builds its own instances
+        _, user_state, token_state = cached
+        user = from_state(get_user_model(), user_state)
+        token = from_state(Token, token_state)
+        token.user = user
+        return user, token
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token(sender, instance, **kwargs):
+    """
+    Logout (rest_auth LogoutView) deletes the token of the user
+    """
+    token_cache.delete(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_user(sender, instance, **kwargs):
+    """
+    Deactivated users and password changes must not keep a cached token
+    """
+    token_cache.delete_user(instance.pk)
@@ -0,0 +1,102 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def get_response_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def get_version_cache():
+    return caches[settings.VERSION_CACHE_ALIAS]
+
+
+def model_version_key(model):
+    return 'model-version:%s' % model._meta.label_lower
+
+
+def model_modified_key(model):
+    return 'model-modified:%s' % model._meta.label_lower
+
+
+def get_model_versions(models):
+    """
+    Current version counter of every model, missing (new or evicted)
+    counters start from the current time so they never repeat an old value
+    """
+    cache = get_version_cache()
+    keys = [model_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def get_models_modified(models):
+    """
+    Unix time of the latest write of any of `models` seen by the version
+    cache, None if it is not known (no write since the cache was cleared)
+    """
+    modified = get_version_cache().get_many([model_modified_key(model) for model in models])
+    return max(modified.values(), default=None)
+
+
+def bump_model_version(model):
+    """
+    Invalidate the cached responses built from `model`.
+
+    The counter is bumped right away and once more after the commit, so a
+    response cached from a concurrent read of the old rows is not reused.
+    """
+    def bump():
+        cache = get_version_cache()
+        key = model_version_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+        cache.set(model_modified_key(model), int(time.time()), None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def cache_response(*models):
+    """
+    Cache the successful GET responses of a function view, keyed by the
+    path, the query parameters and the version counters of `models`.
+
+    Place it under `permission_classes` so only authorized requests are
+    answered from the cache. Off unless settings.RESPONSE_CACHE_ENABLED.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or not settings.RESPONSE_CACHE_ENABLED:
+                return view(request, *args, **kwargs)
+
+            query = sorted(request.query_params.lists())
+            versions = get_model_versions(models)
+            key = 'response:%s' % hashlib.md5(
+                repr((request.path, query, versions)).encode()
+            ).hexdigest()
+
+            cache = get_response_cache()
+            data = cache.get(key)
+            if data is not None:
+                return Response(data, status=status.HTTP_200_OK)
+
+            response = view(request, *args, **kwargs)
+            if isinstance(response, Response) and response.status_code == status.HTTP_200_OK:
+                cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
@@ -1,6 +1,99 @@
 import time
+from collections import OrderedDict
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from rest_framework.exceptions import ValidationError
+
+from utils.cache import bump_model_version
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    """
+    Set based soft delete and restore: one UPDATE statement,
+    no model instance is loaded or saved.
+    Every write bumps the response cache version of the model.
+    """
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        bump_model_version(self.model)
+        return rows
+
+    def bulk_create(self, *args, **kwargs):
+        instances = super().bulk_create(*args, **kwargs)
+        bump_model_version(self.model)
+        return instances
+
+    def delete(self):
+        deleted = super().delete()
+        bump_model_version(self.model)
+        return deleted
+
+    def soft_delete(self, now=None):
+        """
+        Soft delete the live rows together with the live rows of the
+        reverse relations listed in `model.soft_delete_cascade`, one
+        UPDATE per relation in the same transaction
+        """
+        if now is None:
+            now = int(time.time())
+        alive = self.filter(deleted_at=None)
+        with transaction.atomic(using=self.db):
+            for name in self.model.soft_delete_cascade:
+                relation = self.model._meta.get_field(name)
+                relation.related_model.objects.filter(**{
+                    relation.field.name + '__in': alive.values('pk'),
+                    'deleted_at': None
+                }).update(
+                    deleted_at=now,
+                    modify_at=now
+                )
+            return alive.update(
+                deleted_at=now,
+                modify_at=now
+            )
+
+    def restore(self):
+        """
+        Restore the soft deleted rows together with the rows of the reverse
+        relations listed in `model.soft_delete_cascade` which were deleted
+        with them (same deleted_at) and whose other ends are alive, one
+        UPDATE per relation in the same transaction
+        """
+        now = int(time.time())
+        deleted = self.exclude(deleted_at=None)
+        with transaction.atomic(using=self.db):
+            for name in self.model.soft_delete_cascade:
+                relation = self.model._meta.get_field(name)
+                related_model = relation.related_model
+                other_ends = {
+                    field.name + '__deleted_at': None
+                    for field in related_model._meta.concrete_fields
+                    if field.is_relation and field != relation.field
+                    and any(f.name == 'deleted_at' for f in field.related_model._meta.concrete_fields)
+                }
+                related_model.objects.filter(
+                    deleted_at=F(relation.field.name + '__deleted_at'),
+                    **{relation.field.name + '__in': deleted.values('pk')},
+                    **other_ends
+                ).update(
+                    deleted_at=None,
+                    modify_at=now
+                )
+            return deleted.update(
+                deleted_at=None,
+                modify_at=now
+            )
+
+
+class AliveManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """
+    Manager of the rows which are not soft deleted
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at=None)
 
 
 class TimeStampMixin(models.Model):
@@ -11,6 +104,12 @@ class TimeStampMixin(models.Model):
     modify_at = models.IntegerField(default=int(time.time()))
     deleted_at = models.IntegerField(null=True)
 
+    objects = SoftDeleteQuerySet.as_manager()
+    alive = AliveManager()
+
+    # reverse relations soft deleted together with the row
+    soft_delete_cascade = ()
+
     class Meta:
         abstract = True
 
@@ -19,12 +118,43 @@ class TimeStampMixin(models.Model):
         Update timestamps.
         """
         self.modify_at = int(time.time())
-        return super().save(*args, **kwargs)
+        saved = super().save(*args, **kwargs)
+        bump_model_version(type(self))
+        return saved
 
     def delete_now(self):
         self.deleted_at = int(time.time())
 
 
+class SparseFieldsSerializerMixin:
+    """
+    Keeps only the fields listed in context['fields'] and drops the ones
+    listed in context['exclude'] (?fields= and ?exclude= query parameters)
+    """
+
+    @staticmethod
+    def select_field_names(names, context):
+        fields = context.get('fields')
+        exclude = context.get('exclude') or ()
+        if fields is not None and not fields:
+            raise ValidationError({'fields': ['Select at least one field.']})
+        for param, selected in (('fields', fields or ()), ('exclude', exclude)):
+            unknown = set(selected) - set(names)
+            if unknown:
+                raise ValidationError({param: ['Unknown fields: %s.' % ', '.join(sorted(unknown))]})
+        return [
+            name for name in names
+            if (fields is None or name in fields) and name not in exclude
+        ]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        return OrderedDict(
+            (name, fields[name])
+            for name in self.select_field_names(fields, self.context)
+        )
+
+
 class NestedOrFlatSerializerMixin:
     """
     Modifys serializer's depth according to query parameter
@@ -0,0 +1,121 @@
+"""
+PostgreSQL backend with connection health checks and an optional
+in-process connection pool.
+
+Extra keys of the DATABASES entry:
+ - CONN_HEALTH_CHECKS: ping a reused connection (persistent or pooled)
+   before its first query in a request, and reconnect if it is dead
+ - POOL: None, or {'MIN_SIZE': .., 'MAX_SIZE': .., 'TIMEOUT': ..} to take
+   the connections from a psycopg2 ThreadedConnectionPool of the process;
+   a request waits at most TIMEOUT seconds for a free connection
+"""
+import os
+import threading
+
+from django.db.backends.postgresql import base
+from django.db.utils import OperationalError
+from psycopg2 import extensions, pool
+
+# (alias, pid) -> (ThreadedConnectionPool, BoundedSemaphore), built lazily
+# so forked workers never share the sockets of their parent
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def ping(connection):
+    if connection.closed:
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        if not connection.autocommit:
+            # leave no transaction open, autocommit is set right after
+            connection.rollback()
+    except Exception:
+        return False
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.settings_dict.setdefault('CONN_HEALTH_CHECKS', False)
+        self.settings_dict.setdefault('POOL', None)
+        self.health_check_done = False
+
+    def get_pool(self, conn_params):
+        key = (self.alias, os.getpid())
+        with _pools_lock:
+            if key not in _pools:
+                options = self.settings_dict['POOL']
+                _pools[key] = (
+                    pool.ThreadedConnectionPool(options.get('MIN_SIZE', 1), options['MAX_SIZE'], **conn_params),
+                    threading.BoundedSemaphore(options['MAX_SIZE'])
+                )
+            return _pools[key]
+
+    def get_new_connection(self, conn_params):
+        if not self.settings_dict['POOL']:
+            connection = super().get_new_connection(conn_params)
+            self.health_check_done = True
+            return connection
+
+        connection_pool, slots = self.get_pool(conn_params)
+        if not slots.acquire(timeout=self.settings_dict['POOL'].get('TIMEOUT', 30)):
+            raise OperationalError('No free connection in the pool of %r' % self.alias)
+        try:
+            while True:
+                connection = connection_pool.getconn()
+                if not self.settings_dict['CONN_HEALTH_CHECKS'] or ping(connection):
+                    break
+                connection_pool.putconn(connection, close=True)
+        except Exception:
+            slots.release()
+            raise
+
+        # same isolation level handling as a new connection of the parent
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        self.health_check_done = True
+        return connection
+
+    def _close(self):
+        if self.connection is None or not self.settings_dict['POOL']:
+            return super()._close()
+
+        connection_pool, slots = _pools[(self.alias, os.getpid())]
+        connection = self.connection
+        try:
+            broken = bool(connection.closed)
+            if not broken and connection.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    connection.rollback()
+                except Exception:
+                    broken = True
+            connection_pool.putconn(connection, close=broken)
+        finally:
+            slots.release()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # called at the start and the end of every request
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None
+            and self.settings_dict['CONN_HEALTH_CHECKS']
+            and not self.health_check_done
+            and not self.in_atomic_block
+        ):
+            if not self.is_usable():
+                self.close()
+            self.health_check_done = True
+        super().ensure_connection()